@@ -1,21 +1,37 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objs as go
 import plotly.express as px
 from datetime import datetime, timedelta
 import time
-import smtplib
+from concurrent.futures import Future, wait as futures_wait
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+import atexit
 import json
 import os
+import uuid
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures
 from sklearn.pipeline import make_pipeline
-import pytz
 import warnings
+from data_access import DataAccess
+from cache_backend import make_cache_backend
+from market import (
+    PARIS_TZ, NY_TZ, BENCHMARK_SYMBOL, DEFAULT_SYMBOL, DEFAULT_PERIOD, DEFAULT_INTERVAL,
+    SYMBOL_NAMES, get_market_status, get_exchange, get_currency
+)
+from rendering import format_currency, format_currency_column, watchlist_quotes, render_watchlist_html
+from snapshot import read_snapshot, index_summary
+from history_store import CompactHistory, build_panel
+from bar_archive import BarArchive
+from corporate_actions import CorporateActions, actions_from_frame, restate_splits
+from screener import FIELD_LABELS, OPERATORS, PRESET_SCREENS, screen
+from portfolio_history import PortfolioReplay, active_days, performance_stats, benchmark_curve
+from ledger import DATE_FORMAT, Ledger, TRANSACTION_LABELS, TRANSACTION_TYPES, make_transaction
+from risk import VAR_WINDOWS, BETA_WINDOWS, risk_report
+from session_store import SessionRegistry, SessionStore, process_rss
 warnings.filterwarnings('ignore')
 
 # Configuration de la page
@@ -26,9 +42,24 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Configuration des fuseaux horaires
-PARIS_TZ = pytz.timezone('Europe/Paris')
-NY_TZ = pytz.timezone('America/New_York')
+# Couche d'accès aux données (boucle asyncio partagée par toutes les sessions)
+@st.cache_resource
+def get_data_access():
+    return DataAccess()
+
+DATA = get_data_access()
+
+# Cache partagé entre processus/réplicas (voir STOCK_TRACKER_CACHE dans cache_backend.py)
+@st.cache_resource
+def get_cache_backend():
+    return make_cache_backend()
+
+CACHE = get_cache_backend()
+
+# Durées de vie dans le cache partagé (secondes)
+HISTORY_TTL = 300
+INFO_TTL = 300
+FX_TTL = 300
 
 # Style CSS personnalisé
 st.markdown("""
@@ -108,6 +139,26 @@ st.markdown("""
         font-weight: bold;
         display: inline-block;
     }
+    .watchlist-grid {
+        display: grid;
+        gap: 0.75rem;
+    }
+    .watchlist-tile {
+        padding: 0.5rem 0.75rem;
+        border-radius: 0.5rem;
+        background-color: #f8f9fb;
+    }
+    .watchlist-name {
+        font-size: 0.9rem;
+        color: gray;
+    }
+    .watchlist-price {
+        font-size: 1.6rem;
+        font-weight: bold;
+    }
+    .watchlist-tile .stock-change-positive, .watchlist-tile .stock-change-negative {
+        font-size: 0.9rem;
+    }
     .symbol-update {
         background-color: #e7f3ff;
         border-left: 4px solid #2196F3;
@@ -119,12 +170,30 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialisation des variables de session
-if 'price_alerts' not in st.session_state:
-    st.session_state.price_alerts = []
+# Sessions utilisateur partagées par le processus (déchargées sur disque après inactivité)
+@st.cache_resource
+def get_session_registry():
+    registry = SessionRegistry(SessionStore())
+    # Sessions encore en mémoire écrites à l'arrêt du serveur
+    atexit.register(registry.flush)
+    return registry
 
-if 'portfolio' not in st.session_state:
-    st.session_state.portfolio = {}
+SESSIONS = get_session_registry()
+
+# Seul l'identifiant de l'onglet est gardé dans st.session_state ; il est repris
+# de l'URL pour retrouver une session déchargée après une reconnexion
+if 'session_id' not in st.session_state:
+    st.session_state.connection_id = uuid.uuid4().hex
+    st.session_state.session_id = st.query_params.get('sid') or uuid.uuid4().hex
+
+# Watchlist (partagée tant qu'elle n'est pas modifiée), portefeuille, alertes, notifications
+state = SESSIONS.get(st.session_state.session_id, st.session_state.connection_id)
+if state is None:
+    # Onglet dupliqué ou lien copié : la session d'origine reste propre à sa connexion
+    st.session_state.session_id = uuid.uuid4().hex
+    state = SESSIONS.get(st.session_state.session_id, st.session_state.connection_id)
+if st.query_params.get('sid') != st.session_state.session_id:
+    st.query_params['sid'] = st.session_state.session_id
 
 # Dictionnaire de correspondance des anciens symboles vers les nouveaux
 SYMBOL_MAPPING = {
@@ -136,50 +205,6 @@ SYMBOL_MAPPING = {
     'BNP.PA': 'BNP.PA',      # BNP Paribas (inchangé)
 }
 
-# WATCHLIST CORRIGÉE AVEC LES BONS SYMBOLES
-if 'watchlist' not in st.session_state:
-    st.session_state.watchlist = [
-        # CAC 40 - Symboles corrects
-        'MC.PA',        # LVMH
-        'OR.PA',        # L'Oréal
-        'AC.PA',        # Crédit Agricole (CORRIGÉ - était ACA.PA)
-        'BNP.PA',       # BNP Paribas
-        'GLE.PA',       # Société Générale
-        'AIR.PA',       # Airbus
-        'SAF.PA',       # Safran
-        'RMS.PA',       # Hermès
-        'SAN.PA',       # Sanofi
-        'TTE.PA',       # TotalEnergies (CORRIGÉ - était TOTF.PA)
-        'SU.PA',        # Schneider Electric
-        'CAP.PA',       # Capgemini
-        'DSY.PA',       # Dassault Systèmes
-        'ENGI.PA',      # Engie
-        'ORAN.PA',      # Orange (CORRIGÉ - était FTE.PA)
-        'VIV.PA',       # Vivendi
-        'VIE.PA',       # Veolia
-        'RNO.PA',       # Renault
-        'STLAP.PA',     # Stellantis
-        'AI.PA',        # Air Liquide
-        'KER.PA',       # Kering
-        'CDI.PA',       # Christian Dior
-        'DG.PA',        # Vinci
-        'LR.PA',        # Legrand
-        'EL.PA',        # EssilorLuxottica
-        'BN.PA',        # Danone
-        'PUB.PA',       # Publicis
-        'SGO.PA',       # Saint-Gobain
-        'ML.PA',        # Michelin
-        'ATO.PA',       # Atos
-        'HO.PA',        # Thales
-        'SW.PA',        # Sodexo
-        'ERF.PA',       # Eramet
-        'DEC.PA',       # JCDecaux
-        'NOKIA.PA',     # Nokia (Paris)
-    ]
-
-if 'notifications' not in st.session_state:
-    st.session_state.notifications = []
-
 if 'email_config' not in st.session_state:
     st.session_state.email_config = {
         'enabled': False,
@@ -200,21 +225,6 @@ FRENCH_EXCHANGES = {
     '': 'US Listed'
 }
 
-# Jours fériés français
-FRENCH_HOLIDAYS_2024 = [
-    '2024-01-01',  # Jour de l'An
-    '2024-04-01',  # Lundi de Pâques
-    '2024-05-01',  # Fête du Travail
-    '2024-05-08',  # Victoire 1945
-    '2024-05-09',  # Ascension
-    '2024-05-20',  # Pentecôte
-    '2024-07-14',  # Fête Nationale
-    '2024-08-15',  # Assomption
-    '2024-11-01',  # Toussaint
-    '2024-11-11',  # Armistice
-    '2024-12-25',  # Noël
-]
-
 # Actions non cotées ou problématiques avec suggestions
 DELISTED_STOCKS = {
     'EDF.PA': 'Nationalisé en 2023 - Plus disponible',
@@ -283,6 +293,8 @@ with st.sidebar:
          "📧 Notifications email",
          "📤 Export des données",
          "🤖 Prédictions ML",
+         "🔎 Screener",
+         "⚠️ Risque",
          "🇫🇷 Indices CAC 40"]
     )
     
@@ -292,41 +304,8 @@ with st.sidebar:
     st.subheader("⚙️ Configuration")
     st.caption(f"🕐 Fuseau : Heure de Paris (UTC+2)")
     
-    # Créer une liste de symboles avec noms lisibles
-    symbol_display = {
-        'MC.PA': 'LVMH',
-        'OR.PA': "L'Oréal",
-        'AC.PA': 'Crédit Agricole',
-        'BNP.PA': 'BNP Paribas',
-        'GLE.PA': 'Société Générale',
-        'AIR.PA': 'Airbus',
-        'SAF.PA': 'Safran',
-        'RMS.PA': 'Hermès',
-        'SAN.PA': 'Sanofi',
-        'TTE.PA': 'TotalEnergies',
-        'SU.PA': 'Schneider Electric',
-        'CAP.PA': 'Capgemini',
-        'DSY.PA': 'Dassault Systèmes',
-        'ENGI.PA': 'Engie',
-        'ORAN.PA': 'Orange',
-        'VIV.PA': 'Vivendi',
-        'VIE.PA': 'Veolia',
-        'RNO.PA': 'Renault',
-        'STLAP.PA': 'Stellantis',
-        'AI.PA': 'Air Liquide',
-        'KER.PA': 'Kering',
-        'CDI.PA': 'Christian Dior',
-        'DG.PA': 'Vinci',
-        'LR.PA': 'Legrand',
-        'EL.PA': 'EssilorLuxottica',
-        'BN.PA': 'Danone',
-        'PUB.PA': 'Publicis',
-        'SGO.PA': 'Saint-Gobain',
-        'ML.PA': 'Michelin',
-    }
-    
     # Options pour le selectbox avec noms lisibles
-    options_with_names = [f"{sym} - {symbol_display.get(sym, '')}" for sym in st.session_state.watchlist]
+    options_with_names = [f"{sym} - {SYMBOL_NAMES.get(sym, '')}" for sym in state.watchlist]
     options_with_names.append("Autre...")
     
     selected_option = st.selectbox(
@@ -352,18 +331,17 @@ with st.sidebar:
             symbol = symbol_input
             
         # Ajouter à la watchlist si valide
-        if symbol and symbol not in st.session_state.watchlist and symbol not in DELISTED_STOCKS:
+        if symbol and symbol not in state.watchlist and symbol not in DELISTED_STOCKS:
             # Tester si le symbole est valide
             try:
-                test_ticker = yf.Ticker(symbol)
-                test_hist = test_ticker.history(period='1d')
+                test_hist = DATA.history_sync(symbol, period='1d')
                 if not test_hist.empty:
-                    st.session_state.watchlist.append(symbol)
+                    state.add_to_watchlist(symbol)
                     st.success(f"✅ {symbol} ajouté à la watchlist")
                 else:
                     st.error(f"❌ {symbol} n'est pas un symbole valide")
-            except:
-                st.error(f"❌ Erreur lors de la validation de {symbol}")
+            except Exception as e:
+                st.error(f"❌ Erreur lors de la validation de {symbol}: {e}")
     else:
         # Extraire le symbole de l'option sélectionnée
         symbol = selected_option.split(" - ")[0]
@@ -424,74 +402,200 @@ with st.sidebar:
             value=30,
             step=5
         )
+    
+    # Métriques serveur
+    with st.expander("🩺 Métriques serveur"):
+        cache_stats = CACHE.stats()
+        st.caption(f"Cache : {cache_stats['backend']} - {cache_stats['hit_ratio']*100:.0f}% de succès "
+                   f"({cache_stats['hits']} / {cache_stats['hits'] + cache_stats['misses']})")
+        session_stats = SESSIONS.stats()
+        rss = process_rss()
+        st.caption(f"Sessions : {session_stats['active']} actives, {session_stats['stored']} sur disque "
+                   f"({session_stats['evicted']} déchargées) - {session_stats['transactions']} transactions, "
+                   f"{session_stats['custom_watchlists']} watchlists personnalisées en mémoire")
+        if rss is not None:
+            st.caption(f"Mémoire du processus : {rss / 2**20:,.0f} Mo")
+        open_breakers = DATA.breaker.open_keys()
+        if open_breakers:
+            st.caption(f"Symboles suspendus : {', '.join(open_breakers)}")
 
 # Fonctions utilitaires
+BAR_ARCHIVE = BarArchive()
+
+# Dividendes et divisions relevés avec les barres archivées (une fois par symbole)
+ACTIONS = CorporateActions()
+
+# Barres ajustées des divisions par Yahoo mais pas des dividendes, accompagnées des opérations sur titre
+RAW_BARS = {'auto_adjust': False, 'actions': True}
+
+# Périodes servies depuis l'archive disque (en jours calendaires, None = max)
+ARCHIVE_PERIOD_DAYS = {
+    '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366,
+    '2y': 731, '5y': 1827, '10y': 3653, 'max': None
+}
+
+def period_start_ns(period):
+    """Début (epoch ns UTC) d'une période yfinance archivable"""
+    days = ARCHIVE_PERIOD_DAYS[period]
+    if days is None:
+        return None
+    return time.time_ns() - days * 86400 * 10**9
+
+@st.cache_resource(ttl=300, max_entries=1024, show_spinner=False)
+def load_raw_history(symbol, period, interval):
+    """Barres archivées partagées entre sessions (sans copie) et entre réplicas (cache partagé)"""
+    compact, events = CACHE.get_or_compute(
+        f"raw:{symbol}:{period}:{interval}",
+        HISTORY_TTL,
+        lambda: fetch_raw_history(symbol, period, interval)
+    )
+    ACTIONS.merge(symbol, events)
+    return compact
+
+@st.cache_resource(ttl=300, max_entries=1024, show_spinner=False)
+def load_compact_history(symbol, period, interval):
+    """Historique ajusté des dividendes et divisions, dérivé des barres archivées"""
+    return ACTIONS.adjust(symbol, load_raw_history(symbol, period, interval))
+
+@st.cache_resource(ttl=300, max_entries=1024, show_spinner=False)
+def load_traded_history(symbol, period, interval):
+    """Cours effectivement traités (avant divisions), pour un registre dont les divisions sont des transactions"""
+    return ACTIONS.unsplit(symbol, load_raw_history(symbol, period, interval))
+
+def split_timestamps(events):
+    return events['ts'][events['split'] > 0]
+
+def fetch_raw_history(symbol, period, interval):
+    """Télécharge les barres en s'appuyant sur l'archive disque ; retourne (historique, événements).
+
+    Une division relevée dans le téléchargement invalide les barres archivées
+    avant elle (ancienne base de prix).
+    """
+    if period not in ARCHIVE_PERIOD_DAYS:
+        frame = DATA.history_sync(symbol, period=period, interval=interval, **RAW_BARS)
+        compact = CompactHistory.from_frame(frame, PARIS_TZ.zone)
+        events = actions_from_frame(frame)
+        BAR_ARCHIVE.discard_if_older(symbol, interval, split_timestamps(events))
+        BAR_ARCHIVE.append(symbol, interval, compact)
+        return compact, events
+    
+    start = period_start_ns(period)
+    if BAR_ARCHIVE.covers(symbol, interval, start):
+        # Archive à jour : seules les barres depuis la dernière archivée sont téléchargées
+        last = BAR_ARCHIVE.last_timestamp(symbol, interval)
+        try:
+            fresh = DATA.history_sync(symbol, start=pd.Timestamp(last, tz='UTC'), interval=interval, **RAW_BARS)
+            events = actions_from_frame(fresh)
+            if (not BAR_ARCHIVE.discard_if_older(symbol, interval, split_timestamps(events))
+                    and BAR_ARCHIVE.append(symbol, interval, CompactHistory.from_frame(fresh, PARIS_TZ.zone))):
+                return BAR_ARCHIVE.range(symbol, interval, start=start, tz=PARIS_TZ.zone), events
+            # Division récente, téléchargement vide ou laissant un trou : historique complet ci-dessous
+        except Exception:
+            pass
+    
+    frame = DATA.history_sync(symbol, period=period, interval=interval, **RAW_BARS)
+    compact = CompactHistory.from_frame(frame, PARIS_TZ.zone)
+    events = actions_from_frame(frame)
+    BAR_ARCHIVE.discard_if_older(symbol, interval, split_timestamps(events))
+    if compact.is_empty:
+        # Ex: 1m sur plusieurs mois, accumulé au fil des téléchargements
+        return BAR_ARCHIVE.range(symbol, interval, start=start, tz=PARIS_TZ.zone), events
+    BAR_ARCHIVE.store(symbol, interval, compact, since=start)
+    return compact, events
+
 @st.cache_data(ttl=300)
-def load_stock_data(symbol, period, interval):
-    """Charge les données boursières avec correction automatique"""
+def load_stock_info(symbol):
+    """Charge les informations de l'entreprise"""
+    return CACHE.get_or_compute(f"info:{symbol}", INFO_TTL, lambda: DATA.info_sync(symbol))
+
+@st.cache_data(ttl=300)
+def load_fx_rate(currency):
+    """Taux de change EUR → devise"""
+    return CACHE.get_or_compute(f"fx:EUR{currency}", FX_TTL, lambda: DATA.fx_rate_sync(currency))
+
+@st.cache_resource(ttl=60, show_spinner=False)
+def load_snapshot():
+    """Instantané précalculé de la page par défaut (voir snapshot.py)"""
+    return read_snapshot()
+
+def load_index_summary():
+    """Résumé du CAC 40 (dernier cours et variation)"""
     try:
-        # Vérifier et corriger le symbole si nécessaire
-        original_symbol = symbol
-        fixed_symbol, message = validate_and_fix_symbol(symbol)
-        
-        if fixed_symbol is None:
-            st.error(f"❌ {original_symbol} - {message}")
-            return None, None
-        elif fixed_symbol != original_symbol:
-            st.info(f"🔄 Correction automatique: {original_symbol} → {fixed_symbol}")
-            symbol = fixed_symbol
-        
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period, interval=interval)
-        info = ticker.info
-        
-        # Convertir l'index en heure de Paris
-        if not hist.empty:
-            if hist.index.tz is None:
-                hist.index = hist.index.tz_localize('UTC').tz_convert(PARIS_TZ)
-            else:
-                hist.index = hist.index.tz_convert(PARIS_TZ)
-        
-        return hist, info
-    except Exception as e:
-        st.error(f"Erreur: {e}")
-        return None, None
-
-def get_exchange(symbol):
-    """Détermine l'échange pour un symbole"""
-    if symbol.endswith('.PA'):
-        return 'Euronext Paris'
-    elif symbol.endswith('.AS'):
-        return 'Euronext Amsterdam'
-    elif symbol.endswith('.BR'):
-        return 'Euronext Brussels'
-    elif symbol.endswith('.L'):
-        return 'London Stock Exchange'
-    elif symbol.endswith('.MI'):
-        return 'Borsa Italiana'
-    elif symbol.endswith('.DE'):
-        return 'Deutsche Börse'
-    else:
-        return 'US/Global'
-
-def get_currency(symbol):
-    """Détermine la devise pour un symbole"""
-    if any(symbol.endswith(suffix) for suffix in ['.PA', '.AS', '.BR', '.MI', '.DE']):
-        return 'EUR'
-    elif symbol.endswith('.L'):
-        return 'GBP'
-    else:
-        return 'USD'
+        return index_summary(load_compact_history(BENCHMARK_SYMBOL, '5d', '1d').close)
+    except Exception:
+        return None
 
-def format_currency(value, symbol):
-    """Formate la monnaie selon le symbole"""
-    currency = get_currency(symbol)
-    if currency == 'EUR':
-        return f"€{value:,.2f}"
-    elif currency == 'GBP':
-        return f"£{value:,.2f}"
-    else:
-        return f"${value:,.2f}"
+def load_compact_histories(symbols, period, interval, adjusted=True):
+    """Charge plusieurs historiques en parallèle ({symbole: historique ou exception}).
+
+    adjusted=False : cours effectivement traités, sans ajustement des divisions.
+    """
+    loader = load_compact_history if adjusted else load_traded_history
+    return DATA.map(lambda sym: loader(sym, period, interval), symbols)
+
+def completed_future(value):
+    """Future déjà résolu (données disponibles sans téléchargement)"""
+    future = Future()
+    future.set_result(value)
+    return future
+
+def start_stock_data(symbol, period, interval):
+    """Lance le chargement des données boursières (avec correction automatique).
+
+    Retourne deux futures (historique, informations) : la page peut être
+    dessinée pendant le téléchargement.
+    """
+    # Vérifier et corriger le symbole si nécessaire
+    original_symbol = symbol
+    fixed_symbol, message = validate_and_fix_symbol(symbol)
+    
+    if fixed_symbol is None:
+        st.error(f"❌ {original_symbol} - {message}")
+        return completed_future(None), completed_future(None)
+    elif fixed_symbol != original_symbol:
+        st.info(f"🔄 Correction automatique: {original_symbol} → {fixed_symbol}")
+        symbol = fixed_symbol
+    
+    # Index converti en heure de Paris par to_frame()
+    history_future = DATA.submit_call(lambda: load_compact_history(symbol, period, interval).to_frame())
+    info_future = DATA.submit_call(load_stock_info, symbol)
+    return history_future, info_future
+
+def period_covering(start):
+    """Plus petite période archivable couvrant une date de début"""
+    days = (datetime.now(PARIS_TZ).replace(tzinfo=None) - start).days + 1
+    for candidate, period_days in ARCHIVE_PERIOD_DAYS.items():
+        if period_days is not None and days <= period_days:
+            return candidate
+    return 'max'
+
+def load_close_panel(symbols, period, adjusted=True):
+    """Clôtures journalières alignées (dates × symboles) à partir des historiques partagés"""
+    histories = load_compact_histories(symbols, period, '1d', adjusted)
+    return build_panel({sym: h for sym, h in histories.items() if not isinstance(h, Exception)})
+
+def load_price_volume_panels(symbols, period):
+    """Panneaux journaliers des clôtures et volumes pour un univers de symboles"""
+    histories = load_compact_histories(symbols, period, '1d')
+    histories = {sym: h for sym, h in histories.items() if not isinstance(h, Exception)}
+    return build_panel(histories, 'close'), build_panel(histories, 'volume')
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_risk_report(_panel, symbols, weights, confidence, period, last_bar):
+    """Analyse de risque par univers et période, recalculée uniquement à l'arrivée d'une nouvelle séance (last_bar)"""
+    return risk_report(_panel, BENCHMARK_SYMBOL, dict(weights) if weights else None, confidence)
+
+def restate_portfolio_splits(ledger):
+    """Applique au registre les divisions d'actions survenues pendant la détention"""
+    if not ledger.aggregates:
+        return []
+    first = min(agg.first_date for agg in ledger.aggregates.values())
+    # Le chargement des barres relève les opérations sur titre de la période
+    load_compact_histories(
+        [s for s in ledger.aggregates if s not in DELISTED_STOCKS],
+        period_covering(datetime.strptime(first, DATE_FORMAT)), '1d', adjusted=False
+    )
+    return restate_splits(ledger, ACTIONS, PARIS_TZ.zone)
 
 def send_email_alert(subject, body, to_email):
     """Envoie une notification par email"""
@@ -505,18 +609,7 @@ def send_email_alert(subject, body, to_email):
         msg['Subject'] = subject
         msg.attach(MIMEText(body, 'html'))
         
-        server = smtplib.SMTP(
-            st.session_state.email_config['smtp_server'], 
-            st.session_state.email_config['smtp_port']
-        )
-        server.starttls()
-        server.login(
-            st.session_state.email_config['email'],
-            st.session_state.email_config['password']
-        )
-        server.send_message(msg)
-        server.quit()
-        return True
+        return DATA.send_email_sync(st.session_state.email_config, msg)
     except Exception as e:
         st.error(f"Erreur d'envoi: {e}")
         return False
@@ -524,7 +617,7 @@ def send_email_alert(subject, body, to_email):
 def check_price_alerts(current_price, symbol):
     """Vérifie les alertes de prix"""
     triggered = []
-    for alert in st.session_state.price_alerts:
+    for alert in state.price_alerts:
         if alert['symbol'] == symbol:
             if alert['condition'] == 'above' and current_price >= alert['price']:
                 triggered.append(alert)
@@ -533,34 +626,6 @@ def check_price_alerts(current_price, symbol):
     
     return triggered
 
-def get_market_status():
-    """Détermine le statut des marchés français"""
-    paris_now = datetime.now(PARIS_TZ)
-    paris_hour = paris_now.hour
-    paris_minute = paris_now.minute
-    paris_weekday = paris_now.weekday()
-    paris_date = paris_now.strftime('%Y-%m-%d')
-    
-    # Weekend (samedi = 5, dimanche = 6)
-    if paris_weekday >= 5:
-        return "Fermé (weekend)", "🔴"
-    
-    # Jours fériés
-    if paris_date in FRENCH_HOLIDAYS_2024:
-        return "Fermé (jour férié)", "🔴"
-    
-    # Horaires Euronext: 09:00 - 17:30
-    if 9 <= paris_hour < 17:
-        return "Ouvert", "🟢"
-    elif paris_hour == 17 and paris_minute <= 30:
-        return "Ouvert", "🟢"
-    elif 7 <= paris_hour < 9:
-        return "Pré-ouverture", "🟡"
-    elif 17 < paris_hour < 20:
-        return "Après-clôture", "🟡"
-    else:
-        return "Fermé", "🔴"
-
 def safe_get_metric(hist, metric, index=-1):
     """Récupère une métrique en toute sécurité"""
     try:
@@ -570,72 +635,82 @@ def safe_get_metric(hist, metric, index=-1):
     except:
         return 0
 
-# Chargement des données avec correction automatique
-hist, info = load_stock_data(symbol, period, interval)
+def render_data_warnings_and_alerts(slot, hist, symbol, check_alerts=True):
+    """Avertissements si les données manquent, sinon vérification des alertes ; retourne le prix actuel.
 
-# Vérification si les données sont disponibles
-if hist is None or hist.empty:
-    st.warning(f"⚠️ Impossible de charger les données pour {symbol}. Vérifiez que le symbole est correct.")
-    
-    # Suggestions spécifiques
-    if symbol in DELISTED_STOCKS:
-        st.error(f"❌ {DELISTED_STOCKS[symbol]}")
-    elif symbol == 'ACA.PA':
-        st.info("🔍 Le Crédit Agricole utilise maintenant le symbole **AC.PA**")
-    elif symbol == 'TOTF.PA':
-        st.info("🔍 TotalEnergies utilise maintenant le symbole **TTE.PA**")
-    elif symbol == 'FTE.PA':
-        st.info("🔍 Orange utilise maintenant le symbole **ORAN.PA**")
-    
-    current_price = 0
-else:
-    current_price = safe_get_metric(hist, 'Close')
-    
-    # Vérification des alertes
-    triggered_alerts = check_price_alerts(current_price, symbol)
-    for alert in triggered_alerts:
-        st.balloons()
-        st.success(f"🎯 Alerte déclenchée pour {symbol} à {format_currency(current_price, symbol)}")
+    check_alerts=False (historique de l'instantané, possiblement vieux de
+    24 h) : les alertes ne sont évaluées qu'au rendu avec les données fraîches.
+    """
+    with slot.container():
+        # Vérification si les données sont disponibles
+        if hist is None or hist.empty:
+            st.warning(f"⚠️ Impossible de charger les données pour {symbol}. Vérifiez que le symbole est correct.")
+            
+            # Suggestions spécifiques
+            if symbol in DELISTED_STOCKS:
+                st.error(f"❌ {DELISTED_STOCKS[symbol]}")
+            elif symbol == 'ACA.PA':
+                st.info("🔍 Le Crédit Agricole utilise maintenant le symbole **AC.PA**")
+            elif symbol == 'TOTF.PA':
+                st.info("🔍 TotalEnergies utilise maintenant le symbole **TTE.PA**")
+            elif symbol == 'FTE.PA':
+                st.info("🔍 Orange utilise maintenant le symbole **ORAN.PA**")
+            
+            return 0
+        
+        current_price = safe_get_metric(hist, 'Close')
+        if not check_alerts:
+            return current_price
         
-        # Notification email
-        if st.session_state.email_config['enabled']:
-            subject = f"🚨 Alerte prix - {symbol}"
-            body = f"""
-            <h2>Alerte de prix déclenchée</h2>
-            <p><b>Symbole:</b> {symbol}</p>
-            <p><b>Prix actuel:</b> {format_currency(current_price, symbol)}</p>
-            <p><b>Condition:</b> {alert['condition']} {format_currency(alert['price'], symbol)}</p>
-            <p><b>Date:</b> {datetime.now(PARIS_TZ).strftime('%Y-%m-%d %H:%M:%S')} (heure Paris)</p>
-            """
-            send_email_alert(subject, body, st.session_state.email_config['email'])
+        # Vérification des alertes
+        triggered_alerts = check_price_alerts(current_price, symbol)
+        for alert in triggered_alerts:
+            st.balloons()
+            st.success(f"🎯 Alerte déclenchée pour {symbol} à {format_currency(current_price, symbol)}")
+            state.notifications.append({
+                'symbol': symbol,
+                'price': float(current_price),
+                'condition': alert['condition'],
+                'date': datetime.now(PARIS_TZ).strftime('%Y-%m-%d %H:%M:%S'),
+            })
+            
+            # Notification email
+            if st.session_state.email_config['enabled']:
+                subject = f"🚨 Alerte prix - {symbol}"
+                body = f"""
+                <h2>Alerte de prix déclenchée</h2>
+                <p><b>Symbole:</b> {symbol}</p>
+                <p><b>Prix actuel:</b> {format_currency(current_price, symbol)}</p>
+                <p><b>Condition:</b> {alert['condition']} {format_currency(alert['price'], symbol)}</p>
+                <p><b>Date:</b> {datetime.now(PARIS_TZ).strftime('%Y-%m-%d %H:%M:%S')} (heure Paris)</p>
+                """
+                send_email_alert(subject, body, st.session_state.email_config['email'])
+            
+            # Retirer l'alerte si elle est à usage unique
+            if alert.get('one_time', False):
+                state.price_alerts.remove(alert)
         
-        # Retirer l'alerte si elle est à usage unique
-        if alert.get('one_time', False):
-            st.session_state.price_alerts.remove(alert)
+        return current_price
 
-# ============================================================================
-# SECTION 1: TABLEAU DE BORD
-# ============================================================================
-if menu == "📈 Tableau de bord":
-    # Statut du marché
-    market_status, market_icon = get_market_status()
-    st.info(f"{market_icon} Marché Euronext Paris: {market_status}")
+def render_symbol_header(slot, symbol, info):
+    """Titre avec le nom de l'entreprise si disponible"""
+    company_name = info.get('longName', symbol) if info else symbol
+    slot.subheader(f"📊 {company_name} ({symbol}) - {get_exchange(symbol)}")
+
+def render_price_metrics(slot, hist, symbol):
+    """Métriques principales et date de dernière mise à jour"""
+    if hist is None or hist.empty:
+        slot.warning(f"Aucune donnée disponible pour {symbol}")
+        return
     
-    if hist is not None and not hist.empty:
-        # Métriques principales
-        exchange = get_exchange(symbol)
-        currency = get_currency(symbol)
-        
-        # Nom de l'entreprise si disponible
-        company_name = info.get('longName', symbol) if info else symbol
-        st.subheader(f"📊 {company_name} ({symbol}) - {exchange}")
-        
+    current_price = safe_get_metric(hist, 'Close')
+    previous_close = safe_get_metric(hist, 'Close', -2) if len(hist) > 1 else current_price
+    change = current_price - previous_close
+    change_pct = (change / previous_close * 100) if previous_close != 0 else 0
+    
+    with slot.container():
         col1, col2, col3, col4 = st.columns(4)
         
-        previous_close = safe_get_metric(hist, 'Close', -2) if len(hist) > 1 else current_price
-        change = current_price - previous_close
-        change_pct = (change / previous_close * 100) if previous_close != 0 else 0
-        
         with col1:
             st.metric(
                 label="Prix actuel",
@@ -665,81 +740,89 @@ if menu == "📈 Tableau de bord":
         
         # Dernière mise à jour
         st.caption(f"Dernière mise à jour: {hist.index[-1].strftime('%Y-%m-%d %H:%M:%S')} (heure Paris)")
-        
-        # Graphique principal
-        st.subheader("📉 Évolution du prix")
-        
-        fig = go.Figure()
-        
-        # Chandeliers ou ligne selon l'intervalle
-        if interval in ["1m", "5m", "15m", "30m", "1h"]:
-            fig.add_trace(go.Candlestick(
-                x=hist.index,
-                open=hist['Open'],
-                high=hist['High'],
-                low=hist['Low'],
-                close=hist['Close'],
-                name='Prix',
-                increasing_line_color='#00cc96',
-                decreasing_line_color='#ef553b'
-            ))
-        else:
-            fig.add_trace(go.Scatter(
-                x=hist.index,
-                y=hist['Close'],
-                mode='lines',
-                name='Prix',
-                line=dict(color='#0055A4', width=2)
-            ))
-        
-        # Ajouter les moyennes mobiles
-        if len(hist) >= 20:
-            ma_20 = hist['Close'].rolling(window=20).mean()
-            fig.add_trace(go.Scatter(
-                x=hist.index,
-                y=ma_20,
-                mode='lines',
-                name='MA 20',
-                line=dict(color='orange', width=1, dash='dash')
-            ))
-        
-        if len(hist) >= 50:
-            ma_50 = hist['Close'].rolling(window=50).mean()
-            fig.add_trace(go.Scatter(
-                x=hist.index,
-                y=ma_50,
-                mode='lines',
-                name='MA 50',
-                line=dict(color='purple', width=1, dash='dash')
-            ))
-        
-        # Volume
-        fig.add_trace(go.Bar(
+
+def render_price_chart(slot, hist, symbol, period, interval):
+    """Graphique principal : prix, moyennes mobiles et volume"""
+    if hist is None or hist.empty:
+        slot.empty()
+        return
+    
+    currency = get_currency(symbol)
+    fig = go.Figure()
+    
+    # Chandeliers ou ligne selon l'intervalle
+    if interval in ["1m", "5m", "15m", "30m", "1h"]:
+        fig.add_trace(go.Candlestick(
             x=hist.index,
-            y=hist['Volume'],
-            name='Volume',
-            yaxis='y2',
-            marker=dict(color='lightgray', opacity=0.3)
+            open=hist['Open'],
+            high=hist['High'],
+            low=hist['Low'],
+            close=hist['Close'],
+            name='Prix',
+            increasing_line_color='#00cc96',
+            decreasing_line_color='#ef553b'
         ))
-        
-        fig.update_layout(
-            title=f"{symbol} - {period} (heure Paris)",
-            yaxis_title=f"Prix ({'€' if currency=='EUR' else '£' if currency=='GBP' else '$'})",
-            yaxis2=dict(
-                title="Volume",
-                overlaying='y',
-                side='right',
-                showgrid=False
-            ),
-            xaxis_title="Date (heure Paris)",
-            height=600,
-            hovermode='x unified',
-            template='plotly_white'
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Informations sur l'entreprise
+    else:
+        fig.add_trace(go.Scatter(
+            x=hist.index,
+            y=hist['Close'],
+            mode='lines',
+            name='Prix',
+            line=dict(color='#0055A4', width=2)
+        ))
+    
+    # Ajouter les moyennes mobiles
+    if len(hist) >= 20:
+        ma_20 = hist['Close'].rolling(window=20).mean()
+        fig.add_trace(go.Scatter(
+            x=hist.index,
+            y=ma_20,
+            mode='lines',
+            name='MA 20',
+            line=dict(color='orange', width=1, dash='dash')
+        ))
+    
+    if len(hist) >= 50:
+        ma_50 = hist['Close'].rolling(window=50).mean()
+        fig.add_trace(go.Scatter(
+            x=hist.index,
+            y=ma_50,
+            mode='lines',
+            name='MA 50',
+            line=dict(color='purple', width=1, dash='dash')
+        ))
+    
+    # Volume
+    fig.add_trace(go.Bar(
+        x=hist.index,
+        y=hist['Volume'],
+        name='Volume',
+        yaxis='y2',
+        marker=dict(color='lightgray', opacity=0.3)
+    ))
+    
+    fig.update_layout(
+        title=f"{symbol} - {period} (heure Paris)",
+        yaxis_title=f"Prix ({'€' if currency=='EUR' else '£' if currency=='GBP' else '$'})",
+        yaxis2=dict(
+            title="Volume",
+            overlaying='y',
+            side='right',
+            showgrid=False
+        ),
+        xaxis_title="Date (heure Paris)",
+        height=600,
+        hovermode='x unified',
+        template='plotly_white'
+    )
+    
+    slot.plotly_chart(fig, use_container_width=True)
+
+def render_company_info(slot, info, symbol):
+    """Informations sur l'entreprise"""
+    exchange = get_exchange(symbol)
+    currency = get_currency(symbol)
+    with slot.container():
         with st.expander("ℹ️ Informations sur l'entreprise"):
             if info:
                 col1, col2 = st.columns(2)
@@ -769,8 +852,53 @@ if menu == "📈 Tableau de bord":
                     st.write(f"**Beta :** {info.get('beta', 'N/A')}")
             else:
                 st.write("Informations non disponibles")
-    else:
-        st.warning(f"Aucune donnée disponible pour {symbol}")
+
+# Première page d'une nouvelle session : rendu immédiat depuis l'instantané précalculé
+snapshot = None
+if 'first_paint_done' not in st.session_state:
+    st.session_state.first_paint_done = True
+    if (symbol, period, interval) == (DEFAULT_SYMBOL, DEFAULT_PERIOD, DEFAULT_INTERVAL):
+        snapshot = load_snapshot()
+
+if snapshot is not None:
+    history_future = completed_future(snapshot['history'].to_frame())
+    info_future = completed_future(snapshot['info'])
+    
+    # Données fraîches chargées en arrière-plan dans les caches partagés
+    snapshot_refresh = [
+        DATA.submit_call(load_compact_history, symbol, period, interval),
+        DATA.submit_call(load_stock_info, symbol),
+        DATA.submit_call(load_compact_history, BENCHMARK_SYMBOL, '5d', '1d'),
+    ] + [
+        DATA.submit_call(load_compact_history, sym, '2d', '1d')
+        for sym in state.watchlist if sym not in DELISTED_STOCKS
+    ]
+    built_at = datetime.fromtimestamp(snapshot['built_at'], PARIS_TZ)
+    st.caption(f"⚡ Instantané du {built_at.strftime('%Y-%m-%d %H:%M')} (heure Paris) - actualisation en cours...")
+else:
+    # Chargement des données avec correction automatique (en arrière-plan)
+    history_future, info_future = start_stock_data(symbol, period, interval)
+
+# Avertissements et alertes, affichés dès que l'historique est disponible
+alerts_slot = st.empty()
+
+# ============================================================================
+# SECTION 1: TABLEAU DE BORD
+# ============================================================================
+if menu == "📈 Tableau de bord":
+    # Statut du marché
+    market_status, market_icon = get_market_status()
+    st.info(f"{market_icon} Marché Euronext Paris: {market_status}")
+    
+    # Squelette : rempli au fur et à mesure de l'arrivée des données
+    header_slot = st.empty()
+    header_slot.subheader(f"📊 {symbol} - {get_exchange(symbol)}")
+    metrics_slot = st.empty()
+    metrics_slot.caption("⏳ Chargement des cours...")
+    st.subheader("📉 Évolution du prix")
+    chart_slot = st.empty()
+    chart_slot.info("⏳ Chargement du graphique...")
+    company_slot = st.empty()
 
 # ============================================================================
 # SECTION 2: PORTEFEUILLE VIRTUEL
@@ -781,7 +909,12 @@ elif menu == "💰 Portefeuille virtuel":
     col1, col2 = st.columns([2, 1])
     
     with col2:
-        st.markdown("### ➕ Ajouter une position")
+        st.markdown("### ➕ Ajouter une transaction")
+        tx_type = st.selectbox(
+            "Type",
+            options=list(TRANSACTION_TYPES),
+            format_func=TRANSACTION_LABELS.get
+        )
         with st.form("add_position"):
             symbol_pf = st.text_input("Symbole", value="MC.PA").upper()
             
@@ -801,69 +934,101 @@ elif menu == "💰 Portefeuille virtuel":
             - .BR: Bruxelles
             """)
             
-            shares = st.number_input("Nombre d'actions", min_value=0.01, step=0.01, value=1.0)
-            buy_price = st.number_input("Prix d'achat (€)", min_value=0.01, step=0.01, value=100.0)
+            shares, price, amount, ratio = 0.0, 0.0, 0.0, 1.0
+            if tx_type in ('buy', 'sell'):
+                shares = st.number_input("Nombre d'actions", min_value=0.01, step=0.01, value=1.0)
+                price = st.number_input(
+                    "Prix d'achat (€)" if tx_type == 'buy' else "Prix de vente (€)",
+                    min_value=0.01, step=0.01, value=100.0
+                )
+                amount = st.number_input("Frais (€)", min_value=0.0, step=0.01, value=0.0)
+            elif tx_type in ('dividend', 'fee'):
+                amount = st.number_input("Montant (€)", min_value=0.01, step=0.01, value=10.0)
+            else:
+                ratio = st.number_input("Actions nouvelles par action ancienne", min_value=0.01, step=0.5, value=2.0)
+            tx_date = st.date_input(
+                "Date",
+                value=datetime.now(PARIS_TZ).date(),
+                max_value=datetime.now(PARIS_TZ).date()
+            )
             
             if st.form_submit_button("Ajouter au portefeuille"):
-                if symbol_pf and shares > 0 and symbol_pf not in DELISTED_STOCKS:
-                    if symbol_pf not in st.session_state.portfolio:
-                        st.session_state.portfolio[symbol_pf] = []
-                    
-                    st.session_state.portfolio[symbol_pf].append({
-                        'shares': shares,
-                        'buy_price': buy_price,
-                        'date': datetime.now(PARIS_TZ).strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                    st.success(f"✅ {shares} actions {symbol_pf} ajoutées")
+                if symbol_pf and symbol_pf not in DELISTED_STOCKS:
+                    try:
+                        state.ledger.record(make_transaction(
+                            tx_type, symbol_pf,
+                            date=datetime.combine(tx_date, datetime.now(PARIS_TZ).time()),
+                            shares=shares, price=price, amount=amount, ratio=ratio
+                        ))
+                        st.success(f"✅ {TRANSACTION_LABELS[tx_type]} {symbol_pf} enregistré(e)")
+                    except ValueError as e:
+                        st.error(f"❌ {e}")
     
     with col1:
         st.markdown("### 📊 Performance du portefeuille")
         
-        if st.session_state.portfolio:
+        ledger = state.ledger
+        for split in restate_portfolio_splits(ledger):
+            st.info(f"🔀 Division {split['symbol']} du {split['date'][:10]} (x{split['ratio']:g}) appliquée au portefeuille")
+        positions = ledger.open_positions()
+        
+        if positions:
             portfolio_data = []
             total_value_eur = 0
             total_cost_eur = 0
             
-            for symbol_pf, positions in st.session_state.portfolio.items():
+            # Cours chargés en parallèle (un symbole lent ne bloque pas les autres)
+            portfolio_histories = load_compact_histories(
+                [s for s in positions if s not in DELISTED_STOCKS], '1d', '1d'
+            )
+            
+            # Lecture des agrégats précalculés (aucun rejeu des transactions)
+            for symbol_pf, position in positions.items():
                 try:
                     # Vérifier si le symbole est toujours valide
                     if symbol_pf in DELISTED_STOCKS:
                         st.warning(f"⚠️ {symbol_pf} n'est plus coté")
                         continue
                     
-                    ticker = yf.Ticker(symbol_pf)
-                    hist = ticker.history(period='1d')
-                    if not hist.empty:
-                        current = hist['Close'].iloc[-1]
+                    compact = portfolio_histories[symbol_pf]
+                    if isinstance(compact, Exception):
+                        raise compact
+                    if not compact.is_empty:
+                        current = float(compact.close[-1])
                     else:
                         current = 0
                     
                     exchange = get_exchange(symbol_pf)
                     currency = get_currency(symbol_pf)
                     
-                    for pos in positions:
-                        shares = pos['shares']
-                        buy_price = pos['buy_price']
-                        cost = shares * buy_price
-                        value = shares * current
-                        profit = value - cost
-                        profit_pct = (profit / cost * 100) if cost > 0 else 0
-                        
-                        if currency == 'EUR':
-                            total_cost_eur += cost
-                            total_value_eur += value
-                        
-                        portfolio_data.append({
-                            'Symbole': symbol_pf,
-                            'Marché': exchange,
-                            'Devise': currency,
-                            'Actions': shares,
-                            "Prix d'achat": format_currency(buy_price, symbol_pf),
-                            'Prix actuel': format_currency(current, symbol_pf) if current > 0 else "N/A",
-                            'Valeur': format_currency(value, symbol_pf) if value > 0 else "0",
-                            'Profit': format_currency(profit, symbol_pf),
-                            'Profit %': f"{profit_pct:.1f}%"
-                        })
+                    # Conversion en EUR pour les totaux
+                    try:
+                        fx_rate = load_fx_rate(currency)
+                    except Exception:
+                        fx_rate = None
+                        st.warning(f"Taux EUR/{currency} indisponible : {symbol_pf} exclu des totaux")
+                    
+                    cost = position.cost_basis
+                    value = position.quantity * current
+                    profit = value - cost
+                    profit_pct = (profit / cost * 100) if cost > 0 else 0
+                    
+                    if fx_rate:
+                        total_cost_eur += cost / fx_rate
+                        total_value_eur += value / fx_rate
+                    
+                    portfolio_data.append({
+                        'Symbole': symbol_pf,
+                        'Marché': exchange,
+                        'Devise': currency,
+                        'Actions': position.quantity,
+                        "Prix moyen": position.average_cost,
+                        'Prix actuel': current,
+                        'Valeur': value,
+                        'Profit': profit,
+                        'Profit %': profit_pct,
+                        'Réalisé': position.realized_pnl
+                    })
                 except Exception as e:
                     st.warning(f"Impossible de charger {symbol_pf}")
             
@@ -884,17 +1049,293 @@ elif menu == "💰 Portefeuille virtuel":
                 # Tableau des positions
                 st.markdown("### 📋 Positions détaillées")
                 df_portfolio = pd.DataFrame(portfolio_data)
+                
+                # Formatage par colonne (devise résolue une fois par symbole)
+                symbols_col = df_portfolio['Symbole'].to_numpy()
+                current_col = df_portfolio['Prix actuel'].to_numpy()
+                value_col = df_portfolio['Valeur'].to_numpy()
+                df_portfolio["Prix moyen"] = format_currency_column(df_portfolio["Prix moyen"], symbols_col)
+                df_portfolio['Prix actuel'] = np.where(
+                    current_col > 0, format_currency_column(current_col, symbols_col), "N/A"
+                )
+                df_portfolio['Valeur'] = np.where(
+                    value_col > 0, format_currency_column(value_col, symbols_col), "0"
+                )
+                df_portfolio['Profit'] = format_currency_column(df_portfolio['Profit'], symbols_col)
+                df_portfolio['Profit %'] = df_portfolio['Profit %'].map('{:.1f}%'.format)
+                df_portfolio['Réalisé'] = format_currency_column(df_portfolio['Réalisé'], symbols_col)
                 st.dataframe(df_portfolio, use_container_width=True)
                 
+                with st.expander(f"🧾 Journal des transactions ({len(ledger)})"):
+                    # Seules les dernières transactions sont affichées
+                    recent = pd.DataFrame(ledger.transactions[-200:][::-1])
+                    recent['type'] = recent['type'].map(TRANSACTION_LABELS)
+                    st.dataframe(recent.drop(columns=['id']), use_container_width=True)
+                
+                # Historique de performance (positions en EUR)
+                st.markdown("### 📈 Historique de performance")
+                lots = [
+                    lot for lot in ledger.holding_changes()
+                    if lot['symbol'] not in DELISTED_STOCKS and get_currency(lot['symbol']) == 'EUR'
+                ]
+                if lots:
+                    history_period = period_covering(lots[0]['date'])
+                    # Cours traités (non ajustés des divisions) : les divisions sont des transactions du registre
+                    panel = load_close_panel(sorted({lot['symbol'] for lot in lots}), history_period, adjusted=False)
+                    curves = state.portfolio_replay.update(lots, panel, signature=ledger.signature)
+                    
+                    if curves is not None and active_days(curves).any():
+                        stats = performance_stats(curves)
+                        curves = curves[active_days(curves)]
+                        benchmark_panel = load_close_panel([BENCHMARK_SYMBOL], history_period)
+                        benchmark = benchmark_curve(
+                            curves,
+                            benchmark_panel[BENCHMARK_SYMBOL] if BENCHMARK_SYMBOL in benchmark_panel else None
+                        )
+                        
+                        col_h1, col_h2, col_h3, col_h4 = st.columns(4)
+                        col_h1.metric("Performance", f"{stats['total_return']*100:.1f}%")
+                        col_h2.metric("Volatilité (an.)", f"{stats['volatility']*100:.1f}%")
+                        col_h3.metric("Sharpe", f"{stats['sharpe']:.2f}")
+                        col_h4.metric("Drawdown max", f"{stats['max_drawdown']*100:.1f}%")
+                        
+                        fig_perf = go.Figure()
+                        fig_perf.add_trace(go.Scatter(
+                            x=curves.index,
+                            y=curves['Indice'] / curves['Indice'].iloc[0] * 100,
+                            mode='lines',
+                            name='Portefeuille',
+                            line=dict(color='#0055A4', width=2)
+                        ))
+                        if not benchmark.empty:
+                            fig_perf.add_trace(go.Scatter(
+                                x=benchmark.index,
+                                y=benchmark / curves['Indice'].iloc[0] * 100,
+                                mode='lines',
+                                name='CAC 40',
+                                line=dict(color='#EF4135', width=1, dash='dash')
+                            ))
+                        fig_perf.add_trace(go.Scatter(
+                            x=curves.index,
+                            y=curves['Drawdown'] * 100,
+                            mode='lines',
+                            name='Drawdown (%)',
+                            yaxis='y2',
+                            fill='tozeroy',
+                            line=dict(color='lightgray', width=1)
+                        ))
+                        fig_perf.update_layout(
+                            title="Portefeuille vs CAC 40 (base 100)",
+                            yaxis_title="Base 100",
+                            yaxis2=dict(
+                                title="Drawdown (%)",
+                                overlaying='y',
+                                side='right',
+                                showgrid=False
+                            ),
+                            height=450,
+                            hovermode='x unified',
+                            template='plotly_white'
+                        )
+                        st.plotly_chart(fig_perf, use_container_width=True)
+                        
+                        with st.expander("💶 Valeur et coût quotidiens"):
+                            st.line_chart(curves[['Valeur', 'Coût']])
+                    else:
+                        st.info("Historique insuffisant pour le moment")
+                
                 # Bouton pour vider le portefeuille
                 if st.button("🗑️ Vider le portefeuille"):
-                    st.session_state.portfolio = {}
+                    state.ledger = Ledger()
+                    state.portfolio_replay = PortfolioReplay()
                     st.rerun()
             else:
                 st.info("Aucune donnée de performance disponible")
         else:
             st.info("Aucune position dans le portefeuille. Ajoutez des actions françaises pour commencer !")
 
+# ============================================================================
+# SECTION: SCREENER
+# ============================================================================
+elif menu == "🔎 Screener":
+    st.subheader("🔎 Screener - Watchlist France")
+    
+    universe = [s for s in state.watchlist if s not in DELISTED_STOCKS]
+    
+    col_s1, col_s2 = st.columns([2, 1])
+    with col_s1:
+        preset_name = st.selectbox("Filtre", list(PRESET_SCREENS.keys()) + ["Personnalisé"])
+    with col_s2:
+        top_n = st.number_input("Nombre de résultats", min_value=1, max_value=100, value=10)
+    
+    if preset_name == "Personnalisé":
+        conditions = []
+        field_options = list(FIELD_LABELS.keys())
+        condition_count = st.number_input("Nombre de conditions", min_value=1, max_value=3, value=1)
+        for i in range(int(condition_count)):
+            col_c1, col_c2, col_c3 = st.columns(3)
+            with col_c1:
+                field = st.selectbox("Champ", field_options, format_func=FIELD_LABELS.get, key=f"screen_field_{i}")
+            with col_c2:
+                op = st.selectbox("Opérateur", OPERATORS, key=f"screen_op_{i}")
+            with col_c3:
+                compare_to = st.selectbox(
+                    "Comparer à",
+                    ["Valeur"] + field_options,
+                    format_func=lambda x: x if x == "Valeur" else FIELD_LABELS[x],
+                    key=f"screen_cmp_{i}"
+                )
+                if compare_to == "Valeur":
+                    value = st.number_input("Valeur", value=0.0, key=f"screen_value_{i}")
+                else:
+                    value = compare_to
+            conditions.append({'field': field, 'op': op, 'value': value})
+        rank_by = st.selectbox("Classer par", field_options, format_func=FIELD_LABELS.get)
+    else:
+        conditions = PRESET_SCREENS[preset_name]['conditions']
+        rank_by = PRESET_SCREENS[preset_name]['rank_by']
+    
+    ascending = st.checkbox("Ordre croissant", value=(rank_by == 'rsi14'))
+    
+    if universe:
+        with st.spinner(f"Analyse de {len(universe)} symboles..."):
+            close_panel, volume_panel = load_price_volume_panels(universe, '6mo')
+            try:
+                results = screen(conditions, close_panel, volume_panel, rank_by=rank_by,
+                                 ascending=ascending, top=int(top_n))
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                results = None
+        
+        if results is not None:
+            if results.empty:
+                st.info("Aucun symbole ne satisfait ces conditions aujourd'hui")
+            else:
+                st.caption(f"{len(results)} résultat(s) - séance du {close_panel.index[-1].strftime('%Y-%m-%d')}")
+                st.dataframe(results.round(2), use_container_width=True)
+    else:
+        st.info("La watchlist est vide")
+
+# ============================================================================
+# SECTION: RISQUE
+# ============================================================================
+elif menu == "⚠️ Risque":
+    st.subheader("⚠️ Analyse de risque")
+    
+    col_r1, col_r2, col_r3 = st.columns(3)
+    with col_r1:
+        risk_universe = st.radio("Univers", ["Portefeuille", "Watchlist"], horizontal=True)
+    with col_r2:
+        risk_period = st.selectbox("Historique", ['6mo', '1y', '2y', '5y'], index=1)
+    with col_r3:
+        confidence = st.selectbox("Niveau de confiance", [0.95, 0.99], format_func='{:.0%}'.format)
+    
+    if risk_universe == "Portefeuille":
+        restate_portfolio_splits(state.ledger)
+        positions = state.ledger.open_positions()
+        universe = [s for s in positions if s not in DELISTED_STOCKS]
+    else:
+        positions = None
+        universe = [s for s in state.watchlist if s not in DELISTED_STOCKS]
+    universe = [s for s in universe if s != BENCHMARK_SYMBOL]
+    
+    if not universe:
+        st.info("Aucun symbole à analyser dans cet univers")
+    else:
+        with st.spinner(f"Analyse de {len(universe)} symboles..."):
+            panel = load_close_panel(universe + [BENCHMARK_SYMBOL], risk_period)
+            weights = None
+            if positions is not None and not panel.empty:
+                # Poids en valeur de marché (EUR) à la dernière clôture
+                last_close = panel.iloc[-1]
+                weights = {}
+                for sym in universe:
+                    try:
+                        fx_rate = load_fx_rate(get_currency(sym))
+                    except Exception:
+                        continue
+                    if sym in last_close and pd.notna(last_close[sym]):
+                        weights[sym] = round(positions[sym].quantity * float(last_close[sym]) / fx_rate, 2)
+                weights = tuple(sorted(weights.items()))
+            try:
+                if panel.empty:
+                    raise ValueError("Aucun historique disponible")
+                report = load_risk_report(panel, tuple(sorted(universe)), weights, confidence,
+                                          risk_period, panel.index[-1])
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                report = None
+        
+        if report is not None:
+            st.caption(
+                f"{report['observations']} séances du {report['start'].strftime('%Y-%m-%d')} "
+                f"au {report['end'].strftime('%Y-%m-%d')}"
+            )
+            if report['excluded']:
+                st.warning(f"Historique insuffisant, exclus : {', '.join(report['excluded'])}")
+            
+            var_window = max(report['var']) if report['var'] else None
+            beta_window = 60 if 60 in report['beta'] else (max(report['beta']) if report['beta'] else None)
+            col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+            col_m1.metric("Volatilité (an.)", f"{report['volatility']*100:.1f}%")
+            if var_window:
+                portfolio_var = report['var'][var_window].loc['Portefeuille']
+                col_m2.metric(f"VaR 1j ({var_window} s.)", f"{portfolio_var['VaR hist.']*100:.2f}%")
+                col_m3.metric(f"CVaR 1j ({var_window} s.)", f"{portfolio_var['CVaR hist.']*100:.2f}%")
+            if beta_window:
+                col_m4.metric(f"Bêta {beta_window}j vs CAC 40",
+                              f"{report['beta'][beta_window]['Portefeuille'].iloc[-1]:.2f}")
+            
+            st.markdown("### 📉 VaR et CVaR journalières")
+            if report['var']:
+                shown_window = st.selectbox("Fenêtre (séances)", sorted(report['var']),
+                                            index=len(report['var']) - 1)
+                st.dataframe((report['var'][shown_window] * 100).round(2).astype(str) + '%',
+                             use_container_width=True)
+            else:
+                st.info(f"Au moins {min(VAR_WINDOWS)} séances communes sont nécessaires")
+            
+            st.markdown("### 📐 Bêta glissant vs CAC 40")
+            if report['beta']:
+                latest_betas = pd.DataFrame({
+                    f"{window} j": betas.iloc[-1] for window, betas in report['beta'].items()
+                })
+                st.dataframe(latest_betas.round(2), use_container_width=True)
+                st.line_chart(pd.DataFrame({
+                    f"Portefeuille {window} j": betas['Portefeuille']
+                    for window, betas in report['beta'].items()
+                }))
+            else:
+                st.info(f"Au moins {min(BETA_WINDOWS)} séances communes sont nécessaires")
+            
+            col_c1, col_c2 = st.columns(2)
+            with col_c1:
+                st.markdown("### 🔗 Corrélations")
+                fig_corr = px.imshow(
+                    report['correlation'],
+                    zmin=-1, zmax=1,
+                    color_continuous_scale='RdBu_r',
+                    aspect='auto'
+                )
+                fig_corr.update_layout(height=500, template='plotly_white')
+                st.plotly_chart(fig_corr, use_container_width=True)
+            with col_c2:
+                st.markdown("### 🧩 Contributions au risque")
+                contributions = report['contributions'].sort_values('Part du risque', ascending=False)
+                fig_contrib = px.bar(
+                    contributions, x=contributions.index, y='Part du risque',
+                    labels={'x': 'Symbole'}
+                )
+                fig_contrib.update_layout(height=300, template='plotly_white', yaxis_tickformat='.0%')
+                st.plotly_chart(fig_contrib, use_container_width=True)
+                st.dataframe(
+                    contributions.style.format({
+                        'Poids': '{:.1%}', 'Volatilité (an.)': '{:.1%}',
+                        'Contribution marginale': '{:.1%}', 'Part du risque': '{:.1%}'
+                    }),
+                    use_container_width=True
+                )
+
 # ============================================================================
 # SECTIONS SUIVANTES (identiques à avant mais avec les corrections de symboles)
 # ============================================================================
@@ -910,39 +1351,21 @@ with col_w1:
     st.subheader("📋 Watchlist France - CAC 40")
     
     # Filtrer les symboles valides
-    valid_watchlist = [s for s in st.session_state.watchlist if s not in DELISTED_STOCKS]
-    
-    # Afficher en grille
-    cols_per_row = 4
-    for i in range(0, len(valid_watchlist), cols_per_row):
-        cols = st.columns(min(cols_per_row, len(valid_watchlist) - i))
-        for j, sym in enumerate(valid_watchlist[i:i+cols_per_row]):
-            with cols[j]:
-                try:
-                    ticker = yf.Ticker(sym)
-                    hist = ticker.history(period='2d')
-                    if not hist.empty and len(hist) >= 2:
-                        price = hist['Close'].iloc[-1]
-                        prev_close = hist['Close'].iloc[-2]
-                        change = price - prev_close
-                        change_pct = (change / prev_close * 100)
-                        
-                        # Nom simplifié
-                        display_name = sym.replace('.PA', '')
-                        
-                        st.metric(
-                            display_name,
-                            f"€{price:.2f}",
-                            delta=f"{change:.2f} ({change_pct:.1f}%)",
-                            delta_color="normal" if change >= 0 else "inverse"
-                        )
-                    elif not hist.empty:
-                        price = hist['Close'].iloc[-1]
-                        st.metric(sym.replace('.PA', ''), f"€{price:.2f}")
-                    else:
-                        st.metric(sym.replace('.PA', ''), "N/A")
-                except Exception as e:
-                    st.metric(sym.replace('.PA', ''), "Err")
+    valid_watchlist = [s for s in state.watchlist if s not in DELISTED_STOCKS]
+    watchlist_futures = {
+        sym: completed_future(snapshot['watchlist'][sym])
+        if snapshot is not None and sym in snapshot['watchlist']
+        else DATA.submit_call(load_compact_history, sym, '2d', '1d')
+        for sym in valid_watchlist
+    }
+    watchlist_histories = {}
+    
+    # Grille rendue en un seul composant (tuiles en attente affichées "…")
+    watchlist_slot = st.empty()
+    watchlist_slot.markdown(
+        render_watchlist_html(watchlist_quotes(valid_watchlist, watchlist_histories), cols_per_row=4),
+        unsafe_allow_html=True
+    )
 
 with col_w2:
     # Heures actuelles
@@ -956,11 +1379,13 @@ with col_w2:
     market_status, market_icon = get_market_status()
     st.caption(f"{market_icon} Euronext: {market_status}")
     
+    # Résumé CAC 40
+    cac40 = snapshot['cac40'] if snapshot is not None else load_index_summary()
+    if cac40:
+        st.caption(f"📈 CAC 40: {cac40['last']:,.2f} ({cac40['change_pct']:+.2f}%)")
+    
     st.caption(f"Dernière MAJ: {paris_time.strftime('%H:%M:%S')}")
     
-    if auto_refresh and hist is not None and not hist.empty:
-        time.sleep(refresh_rate)
-        st.rerun()
 
 # Footer
 st.markdown("---")
@@ -972,3 +1397,73 @@ st.markdown(
     "</p>",
     unsafe_allow_html=True
 )
+
+# ============================================================================
+# REMPLISSAGE PROGRESSIF : chaque section s'affiche dès que ses données arrivent
+# ============================================================================
+pending = {history_future: 'history', info_future: 'info'}
+pending.update({future: sym for sym, future in watchlist_futures.items()})
+hist, info = None, None
+fill_deadline = time.monotonic() + 60
+
+while pending and time.monotonic() < fill_deadline:
+    # Regroupe les résultats arrivés dans une courte fenêtre : un rendu par lot
+    done, _ = futures_wait(list(pending), timeout=0.2)
+    watchlist_changed = False
+    
+    for future in done:
+        key = pending.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            result = e
+        
+        if key == 'history':
+            if isinstance(result, Exception):
+                st.error(f"Erreur: {result}")
+                result = None
+            hist = result
+            current_price = render_data_warnings_and_alerts(alerts_slot, hist, symbol, check_alerts=snapshot is None)
+            if menu == "📈 Tableau de bord":
+                render_price_metrics(metrics_slot, hist, symbol)
+                render_price_chart(chart_slot, hist, symbol, period, interval)
+        elif key == 'info':
+            info = None if isinstance(result, Exception) else result
+            if menu == "📈 Tableau de bord":
+                render_symbol_header(header_slot, symbol, info)
+                render_company_info(company_slot, info, symbol)
+        else:
+            watchlist_histories[key] = result
+            watchlist_changed = True
+    
+    if watchlist_changed:
+        watchlist_slot.markdown(
+            render_watchlist_html(watchlist_quotes(valid_watchlist, watchlist_histories), cols_per_row=4),
+            unsafe_allow_html=True
+        )
+
+if pending:
+    # Échéance dépassée : les données jamais arrivées sont signalées en erreur
+    waiting = set(pending.values())
+    if 'history' in waiting:
+        alerts_slot.error(f"⏱️ Délai dépassé pour le chargement de {symbol}")
+        if menu == "📈 Tableau de bord":
+            metrics_slot.error("⏱️ Cours indisponibles (délai dépassé)")
+            chart_slot.error("⏱️ Graphique indisponible (délai dépassé)")
+    if 'info' in waiting and menu == "📈 Tableau de bord":
+        render_company_info(company_slot, None, symbol)
+    for sym in valid_watchlist:
+        watchlist_histories.setdefault(sym, TimeoutError(sym))
+    watchlist_slot.markdown(
+        render_watchlist_html(watchlist_quotes(valid_watchlist, watchlist_histories), cols_per_row=4),
+        unsafe_allow_html=True
+    )
+
+if auto_refresh and hist is not None and not hist.empty:
+    time.sleep(refresh_rate)
+    st.rerun()
+
+# Après un premier affichage depuis l'instantané : relancer avec les données fraîches
+if snapshot is not None:
+    futures_wait(snapshot_refresh, timeout=30)
+    st.rerun()
@@ -0,0 +1,297 @@
+"""Archive disque des barres OHLCV telles que fournies par Yahoo (auto_adjust=False : ajustées des
+divisions, pas des dividendes), mappée en mémoire (une série par symbole/intervalle)"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from history_store import CompactHistory
+
+# Enregistrement à taille fixe (32 octets)
+BAR_DTYPE = np.dtype([
+    ('ts', '<i8'),        # epoch en nanosecondes UTC
+    ('open', '<f4'),
+    ('high', '<f4'),
+    ('low', '<f4'),
+    ('close', '<f4'),
+    ('volume', '<i8'),
+])
+
+DEFAULT_DATA_DIR = os.environ.get(
+    'STOCK_TRACKER_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+
+# "Couvert depuis toujours" (période max)
+SINCE_ORIGIN = np.iinfo(np.int64).min
+
+# Tolérance entre le début demandé et la première barre reçue (week-ends, jours fériés)
+COVERAGE_SLACK_NS = 7 * 24 * 3600 * 10**9
+
+
+def _to_records(compact):
+    """Convertit un CompactHistory en enregistrements BAR_DTYPE"""
+    records = np.empty(len(compact), dtype=BAR_DTYPE)
+    records['ts'] = compact.index
+    records['open'] = compact.open
+    records['high'] = compact.high
+    records['low'] = compact.low
+    records['close'] = compact.close
+    records['volume'] = compact.volume
+    return records
+
+
+@contextmanager
+def file_lock(path):
+    """Verrou exclusif entre processus (fichier path + '.lock') le temps d'une lecture-fusion-écriture"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def atomic_write(path, data, mode='wb'):
+    """Écrit data dans un fichier temporaire unique du même répertoire puis le substitue à path"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _same_bars(a, b):
+    """Égalité champ par champ, deux NaN étant considérés égaux"""
+    same = np.ones(len(a), dtype=bool)
+    for name in BAR_DTYPE.names:
+        x, y = a[name], b[name]
+        equal = x == y
+        if x.dtype.kind == 'f':
+            equal |= np.isnan(x) & np.isnan(y)
+        same &= equal
+    return same
+
+
+class BarArchive:
+    """Archive en ajout seul de barres triées par horodatage.
+
+    Chaque série est un fichier binaire d'enregistrements BAR_DTYPE lu via
+    np.memmap : une requête par plage ne lit que les pages nécessaires
+    (recherche dichotomique sur 'ts'), sans parsing ni chargement complet.
+    Les octets déjà écrits ne sont jamais modifiés ni tronqués (des vues
+    mappées, supposées immuables, sont partagées entre sessions) : seul
+    l'ajout en fin de fichier se fait sur place, toute autre écriture passe
+    par un remplacement atomique. Seules les barres closes sont écrites ; la
+    plus récente reste en mémoire jusqu'à l'arrivée de la suivante.
+    """
+
+    def __init__(self, root=DEFAULT_DATA_DIR):
+        # Barres non ajustées des dividendes : les ajustements sont dérivés des opérations sur titre
+        self.root = os.path.join(root, 'raw_bars')
+        self._lock = threading.Lock()
+        # Dernière barre de chaque série, encore susceptible de changer (non écrite)
+        self._open_bars = {}
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, interval, symbol.replace(os.sep, '_') + '.bars')
+
+    def _meta_path(self, symbol, interval):
+        return self._path(symbol, interval) + '.json'
+
+    def _read_meta(self, symbol, interval):
+        try:
+            with open(self._meta_path(symbol, interval)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, symbol, interval, meta):
+        atomic_write(self._meta_path(symbol, interval), json.dumps(meta), mode='w')
+
+    def bars(self, symbol, interval):
+        """Tableau structuré mappé en mémoire (lecture seule)"""
+        path = self._path(symbol, interval)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.empty(0, dtype=BAR_DTYPE)
+        # Ignorer un éventuel enregistrement partiel en fin de fichier
+        count = size // BAR_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(count,))
+
+    def last_timestamp(self, symbol, interval):
+        """Horodatage (ns) de la dernière barre archivée, ou None"""
+        bars = self.bars(symbol, interval)
+        return int(bars['ts'][-1]) if len(bars) else None
+
+    def covers(self, symbol, interval, start):
+        """Indique si l'archive contient toutes les barres depuis start (ns, None = max)"""
+        since = self._read_meta(symbol, interval).get('since')
+        if since is None or self.last_timestamp(symbol, interval) is None:
+            return False
+        return since <= (SINCE_ORIGIN if start is None else start)
+
+    def _split_open_bar(self, symbol, interval, records, last_archived):
+        """Retire la barre la plus récente (potentiellement encore ouverte) et la garde en mémoire.
+
+        Elle n'est écrite qu'une fois suivie d'une barre plus récente : le
+        fichier ne reçoit que des barres closes et n'est pas réécrit à chaque
+        actualisation pendant la séance.
+        """
+        key = (symbol, interval)
+        if len(records) and (last_archived is None or records['ts'][-1] > last_archived):
+            self._open_bars[key] = records[-1:].copy()
+            return records[:-1]
+        open_bar = self._open_bars.get(key)
+        if open_bar is not None and last_archived is not None and open_bar['ts'][0] <= last_archived:
+            del self._open_bars[key]
+        return records
+
+    def _replace(self, path, records):
+        """Écrit une nouvelle version du fichier et la substitue atomiquement"""
+        # Les vues déjà mappées gardent l'ancien fichier
+        atomic_write(path, records.tobytes())
+
+    def append(self, symbol, interval, compact):
+        """Ajoute les nouvelles barres et met à jour la dernière barre (encore ouverte).
+
+        Les barres doivent chevaucher la fin de l'archive : un téléchargement
+        qui laisserait un trou est ignoré (retourne False).
+        """
+        if compact.is_empty:
+            return False
+        records = _to_records(compact)
+        path = self._path(symbol, interval)
+        # Relecture sous verrou inter-processus : deux ajouts concurrents ne dupliquent pas de barres
+        with self._lock, file_lock(path):
+            bars = self.bars(symbol, interval)
+            last_archived = int(bars['ts'][-1]) if len(bars) else None
+            if last_archived is not None and records['ts'][0] > last_archived:
+                return False
+            if last_archived is None:
+                # Nouvelle série : date de la base de prix (voir discard_if_older)
+                meta = self._read_meta(symbol, interval)
+                meta['stored_at'] = time.time_ns()
+                self._write_meta(symbol, interval, meta)
+            records = self._split_open_bar(symbol, interval, records, last_archived)
+            if last_archived is not None and len(records):
+                existing_ts = bars['ts']
+                pos = np.searchsorted(existing_ts, records['ts'])
+                known = (pos < len(existing_ts)) & (existing_ts[np.minimum(pos, len(existing_ts) - 1)] == records['ts'])
+                changed = known.copy()
+                changed[known] = ~_same_bars(bars[pos[known]], records[known])
+                if changed.any():
+                    # Barre close révisée par la source (rare) : nouvelle copie du fichier
+                    merged = np.array(bars)
+                    merged[pos[changed]] = records[changed]
+                    self._replace(path, np.concatenate([merged, records[records['ts'] > last_archived]]))
+                    return True
+                records = records[records['ts'] > last_archived]
+            if len(records):
+                # Ajout en fin de fichier : les pages déjà mappées ne sont pas modifiées
+                with open(path, 'ab') as f:
+                    f.write(records.tobytes())
+        return True
+
+    def store(self, symbol, interval, compact, since):
+        """Enregistre un historique complet couvrant la période commençant à since (ns, None = max)"""
+        if compact.is_empty:
+            return
+        records = _to_records(compact)
+        first = int(records['ts'][0])
+        if since is None:
+            since = SINCE_ORIGIN
+        elif first - since > COVERAGE_SLACK_NS:
+            # Historique tronqué par la source (ex: données intraday limitées)
+            since = first
+
+        path = self._path(symbol, interval)
+        with self._lock, file_lock(path):
+            bars = self.bars(symbol, interval)
+            # Les barres antérieures au téléchargement sont conservées
+            older = np.asarray(bars[bars['ts'] < first]) if len(bars) else bars
+            records = self._split_open_bar(symbol, interval, records, None)
+            merged = np.concatenate([older, records]) if len(older) else records
+            self._replace(path, merged)
+
+            meta = self._read_meta(symbol, interval)
+            stored_at = time.time_ns()
+            if len(older):
+                # Les barres conservées gardent la base de prix de leur écriture
+                if meta.get('since') is not None:
+                    since = min(since, meta['since'])
+                stored_at = min(stored_at, meta.get('stored_at', SINCE_ORIGIN))
+            self._write_meta(symbol, interval, {'since': int(since), 'stored_at': int(stored_at)})
+
+    def discard_if_older(self, symbol, interval, timestamps):
+        """Supprime la série si une partie de ses barres a été écrite avant l'un des horodatages (ns).
+
+        Yahoo réajuste tout l'historique à chaque division : des barres
+        archivées avant une division sont sur l'ancienne base de prix et ne
+        peuvent pas être complétées par des barres récentes. Retourne True si
+        la série a été supprimée (téléchargement complet nécessaire).
+        """
+        if not len(timestamps):
+            return False
+        path = self._path(symbol, interval)
+        with self._lock, file_lock(path):
+            if not os.path.exists(path):
+                return False
+            stored_at = self._read_meta(symbol, interval).get('stored_at', SINCE_ORIGIN)
+            if stored_at >= max(int(ts) for ts in timestamps):
+                return False
+            # Les vues déjà mappées gardent l'ancien fichier
+            for stale in (path, self._meta_path(symbol, interval)):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            self._open_bars.pop((symbol, interval), None)
+        return True
+
+    def range(self, symbol, interval, start=None, end=None, tz='UTC'):
+        """Barres entre start et end (ns, inclus) sous forme de CompactHistory.
+
+        Sans copie pour les barres closes ; la barre ouverte gardée en mémoire
+        est ajoutée en fin de fenêtre (copie de la fenêtre dans ce cas).
+        """
+        bars = self.bars(symbol, interval)
+        ts = bars['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side='right'))
+        window = bars[lo:hi]
+        open_bar = self._open_bars.get((symbol, interval))
+        if open_bar is not None:
+            open_ts = open_bar['ts'][0]
+            if ((not len(ts) or open_ts > ts[-1])
+                    and (start is None or open_ts >= start) and (end is None or open_ts <= end)):
+                window = np.concatenate([window, open_bar])
+        if not len(window):
+            return CompactHistory.empty(tz)
+        return CompactHistory(
+            window['ts'], tz,
+            window['open'], window['high'], window['low'], window['close'],
+            window['volume'],
+        )
@@ -0,0 +1,249 @@
+"""Backends de cache interchangeables (cours, historiques, métadonnées, taux de change).
+
+- MemoryCache : dans le processus (par défaut)
+- SQLiteCache : fichier partagé par tous les processus d'une même machine
+- RedisCache  : serveur Redis (ou compatible) partagé entre réplicas
+
+Le backend est choisi par la variable d'environnement STOCK_TRACKER_CACHE :
+    memory | sqlite:///chemin/cache.db | redis://hote:6379/0
+"""
+import os
+import pickle
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import redis
+except ImportError:  # dépendance optionnelle
+    redis = None
+
+MISS = object()
+
+# Durée maximale d'un calcul protégé contre l'effet de meute (secondes)
+LOCK_TIMEOUT = 30
+
+
+def dumps(value):
+    # Les CompactHistory sont sérialisés colonne par colonne (tableaux NumPy bruts)
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def loads(payload):
+    return pickle.loads(payload)
+
+
+class CacheBackend(ABC):
+    """Interface commune : get/set avec TTL et calcul protégé (get_or_compute)"""
+
+    name = 'base'
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+
+    @abstractmethod
+    def get(self, key):
+        """Valeur en cache ou MISS"""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Enregistre une valeur pour ttl secondes"""
+
+    def acquire(self, key, timeout):
+        """Prend le verrou de calcul d'une clé entre processus ; retourne un jeton ou None"""
+        return True
+
+    def release(self, key, token):
+        pass
+
+    def _key_lock(self, key):
+        with self._key_locks_guard:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get_or_compute(self, key, ttl, compute, lock_timeout=LOCK_TIMEOUT):
+        """Valeur en cache ou calculée une seule fois, même en cas d'accès simultanés.
+
+        Les threads du processus sont sérialisés par un verrou local ; entre
+        processus, un seul détient le verrou partagé et les autres attendent
+        sa valeur plutôt que de solliciter yfinance à leur tour.
+        """
+        value = self.get(key)
+        if value is not MISS:
+            self.hits += 1
+            return value
+
+        with self._key_lock(key):
+            value = self.get(key)
+            if value is not MISS:
+                self.hits += 1
+                return value
+            self.misses += 1
+
+            deadline = time.monotonic() + lock_timeout
+            while True:
+                token = self.acquire(key, lock_timeout)
+                if token:
+                    try:
+                        value = compute()
+                        self.set(key, value, ttl)
+                        return value
+                    finally:
+                        self.release(key, token)
+                time.sleep(0.1)
+                value = self.get(key)
+                if value is not MISS:
+                    return value
+                if time.monotonic() > deadline:
+                    # Détenteur du verrou bloqué : calcul sans mise en cache partagée
+                    return compute()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """Cache local au processus (les valeurs ne sont pas copiées)"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=4096):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISS
+            value, expires = entry
+            if expires < time.time():
+                del self._data[key]
+                return MISS
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                now = time.time()
+                for stale in [k for k, (_, exp) in self._data.items() if exp < now]:
+                    del self._data[stale]
+                if len(self._data) >= self.max_entries:
+                    # Éviction de l'entrée expirant le plus tôt
+                    del self._data[min(self._data, key=lambda k: self._data[k][1])]
+            self._data[key] = (value, time.time() + ttl)
+
+
+class SQLiteCache(CacheBackend):
+    """Cache partagé entre processus d'une même machine via un fichier SQLite (WAL)"""
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return MISS if row is None else loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(dumps(value)), time.time() + ttl)
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+
+    def acquire(self, key, timeout):
+        conn = self._conn()
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn.execute("DELETE FROM locks WHERE key = ? AND expires < ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO locks (key, owner, expires) VALUES (?, ?, ?)",
+            (key, token, now + timeout)
+        )
+        return token if cursor.rowcount == 1 else None
+
+    def release(self, key, token):
+        self._conn().execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, token))
+
+
+class RedisCache(CacheBackend):
+    """Cache partagé via un serveur Redis (ou compatible)"""
+
+    name = 'redis'
+
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url, prefix='stock-tracker:'):
+        if redis is None:
+            raise ImportError("Le backend Redis nécessite le paquet 'redis' (pip install redis)")
+        super().__init__()
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        payload = self.client.get(self.prefix + key)
+        return MISS if payload is None else loads(payload)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, dumps(value), ex=max(int(ttl), 1))
+
+    def acquire(self, key, timeout):
+        token = uuid.uuid4().hex
+        if self.client.set(self.prefix + 'lock:' + key, token, nx=True, px=int(timeout * 1000)):
+            return token
+        return None
+
+    def release(self, key, token):
+        self.client.eval(self._RELEASE_SCRIPT, 1, self.prefix + 'lock:' + key, token)
+
+
+def make_cache_backend(url=None):
+    """Crée le backend décrit par url (par défaut : STOCK_TRACKER_CACHE ou 'memory')"""
+    url = url or os.environ.get('STOCK_TRACKER_CACHE', 'memory')
+    if url == 'memory':
+        return MemoryCache()
+    if url.startswith('sqlite:///'):
+        return SQLiteCache(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url)
+    raise ValueError(f"Backend de cache inconnu : {url}")
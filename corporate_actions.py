@@ -0,0 +1,193 @@
+"""Opérations sur titre (dividendes, divisions) et séries dérivées des barres archivées.
+
+Les barres sont téléchargées avec auto_adjust=False : Yahoo les fournit
+déjà ajustées des divisions, mais pas des dividendes. Les événements relevés
+au passage sont conservés une fois par symbole. Les facteurs cumulés ne
+dépendent que de ces événements : ils sont calculés une fois et réutilisés
+jusqu'à l'apparition d'un nouvel événement, puis appliqués à la demande à
+n'importe quelle fenêtre de barres (dividendes pour les séries ajustées,
+divisions pour retrouver les cours effectivement traités).
+"""
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from bar_archive import DEFAULT_DATA_DIR, atomic_write, file_lock
+from history_store import CompactHistory
+from ledger import DATE_FORMAT, make_transaction
+
+# Un enregistrement par date d'événement
+ACTION_DTYPE = np.dtype([
+    ('ts', '<i8'),            # epoch en nanosecondes UTC (date de détachement / d'effet)
+    ('dividend', '<f8'),      # montant par action (0 si aucun)
+    ('split', '<f8'),         # actions nouvelles par action ancienne (0 si aucune)
+    ('ref_close', '<f8'),     # clôture de la veille du détachement
+])
+
+
+def actions_from_frame(df):
+    """Événements contenus dans un DataFrame yfinance (actions=True, auto_adjust=False)"""
+    if df is None or df.empty or 'Dividends' not in df or 'Stock Splits' not in df:
+        return np.empty(0, dtype=ACTION_DTYPE)
+    dividends = df['Dividends'].fillna(0).to_numpy(dtype=np.float64)
+    splits = df['Stock Splits'].fillna(0).to_numpy(dtype=np.float64)
+    rows = (dividends != 0) | (splits != 0)
+    if not rows.any():
+        return np.empty(0, dtype=ACTION_DTYPE)
+
+    close = df['Close'].to_numpy(dtype=np.float64)
+    # Veille indisponible (première barre) : clôture du jour + dividende
+    previous = np.concatenate([[close[0] + dividends[0]], close[:-1]])
+
+    idx = df.index
+    if idx.tz is None:
+        idx = idx.tz_localize('UTC')
+    events = np.empty(int(rows.sum()), dtype=ACTION_DTYPE)
+    events['ts'] = idx.values.astype('datetime64[ns]').view(np.int64)[rows]
+    events['dividend'] = dividends[rows]
+    events['split'] = splits[rows]
+    events['ref_close'] = previous[rows]
+    return events
+
+
+def cumulative_factors(events):
+    """Facteurs cumulés (dividendes, divisions) des événements postérieurs à chaque barre.
+
+    Retourne (ts des événements, facteur dividendes, facteur divisions) ; les
+    facteurs ont un élément de plus que les événements : l'indice k
+    s'applique aux barres situées entre l'événement k-1 et l'événement k, le
+    dernier (1.0) aux barres postérieures au dernier événement.
+    """
+    split = np.where(events['split'] > 0, events['split'], 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dividend = np.where(
+            (events['dividend'] > 0) & (events['ref_close'] > 0),
+            1.0 - events['dividend'] / events['ref_close'],
+            1.0
+        )
+    # Produits suffixes : une barre est ajustée par tous les événements postérieurs
+    dividend_cum = np.append(np.cumprod(dividend[::-1])[::-1], 1.0)
+    split_cum = np.append(np.cumprod(split[::-1])[::-1], 1.0)
+    return events['ts'], dividend_cum, split_cum
+
+
+def _rescale(bars, event_ts, cumulative, scale_volume):
+    """Multiplie les prix de chaque barre par le facteur cumulé des événements qui la suivent.
+
+    Avec scale_volume, le volume est divisé par le même facteur (nombre
+    d'actions de l'époque).
+    """
+    if bars.is_empty or not len(event_ts) or event_ts[-1] <= bars.index[0]:
+        # Aucun événement postérieur à la première barre : séries inchangées
+        return bars
+    factor = cumulative[np.searchsorted(event_ts, bars.index, side='right')]
+    if (factor == 1.0).all():
+        return bars
+    price = factor.astype(np.float32)
+    volume = np.rint(bars.volume / factor).astype(np.int64) if scale_volume else bars.volume
+    return CompactHistory(
+        bars.index, bars.tz,
+        bars.open * price, bars.high * price, bars.low * price, bars.close * price,
+        volume,
+    )
+
+
+class CorporateActions:
+    """Événements par symbole (un fichier .npy chacun) et facteurs d'ajustement en cache"""
+
+    def __init__(self, root=DEFAULT_DATA_DIR):
+        self.root = os.path.join(root, 'actions')
+        self._events = {}
+        self._factors = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol):
+        return os.path.join(self.root, symbol.replace(os.sep, '_') + '.npy')
+
+    def _load(self, symbol):
+        try:
+            return np.load(self._path(symbol))
+        except (OSError, ValueError):
+            return np.empty(0, dtype=ACTION_DTYPE)
+
+    def events(self, symbol):
+        """Événements connus du symbole, triés par date"""
+        events = self._events.get(symbol)
+        if events is None:
+            events = self._events[symbol] = self._load(symbol)
+        return events
+
+    def merge(self, symbol, events):
+        """Ajoute des événements ; retourne True si au moins un est nouveau"""
+        if not len(events):
+            return False
+        path = self._path(symbol)
+        with self._lock, file_lock(path):
+            # Relu sous verrou : un autre processus a pu ajouter des événements
+            known = self._events[symbol] = self._load(symbol)
+            fresh = events[~np.isin(events['ts'], known['ts'])]
+            if not len(fresh):
+                return False
+            merged = np.sort(np.concatenate([known, fresh]), order='ts')
+            buffer = io.BytesIO()
+            np.save(buffer, merged)
+            atomic_write(path, buffer.getvalue())
+            self._events[symbol] = merged
+        return True
+
+    def factors(self, symbol):
+        """Facteurs cumulés du symbole, recalculés seulement si un événement est apparu"""
+        events = self.events(symbol)
+        signature = (len(events), int(events['ts'][-1]) if len(events) else None)
+        cached = self._factors.get(symbol)
+        if cached is None or cached[0] != signature:
+            cached = (signature, cumulative_factors(events))
+            self._factors[symbol] = cached
+        return cached[1]
+
+    def adjust(self, symbol, bars):
+        """Historique ajusté des dividendes d'une fenêtre de barres (déjà ajustées des divisions).
+
+        Le volume, déjà exprimé en actions actuelles, n'est pas modifié.
+        """
+        event_ts, dividend_cum, _ = self.factors(symbol)
+        return _rescale(bars, event_ts, dividend_cum, scale_volume=False)
+
+    def unsplit(self, symbol, bars):
+        """Cours effectivement traités : annule l'ajustement des divisions postérieures à chaque barre.
+
+        À combiner avec un registre dont les quantités sont retraitées par des
+        transactions de division (restate_splits), jamais avec des cours ajustés.
+        """
+        event_ts, _, split_cum = self.factors(symbol)
+        return _rescale(bars, event_ts, split_cum, scale_volume=True)
+
+    def splits(self, symbol, tz):
+        """Divisions du symbole : [(date 'AAAA-MM-JJ 00:00:00' dans le fuseau tz, ratio)]"""
+        events = self.events(symbol)
+        events = events[events['split'] > 0]
+        dates = pd.DatetimeIndex(events['ts'].view('datetime64[ns]'), tz='UTC').tz_convert(tz).normalize()
+        return [(date.strftime(DATE_FORMAT), float(ratio)) for date, ratio in zip(dates, events['split'])]
+
+
+def restate_splits(ledger, actions, tz):
+    """Ajoute au registre les divisions survenues depuis la première transaction de chaque symbole.
+
+    Les divisions déjà saisies (même jour) ne sont pas dupliquées. Retourne
+    la liste des transactions ajoutées.
+    """
+    added = []
+    for symbol, aggregate in list(ledger.aggregates.items()):
+        for date, ratio in actions.splits(symbol, tz):
+            if date <= aggregate.first_date or date[:10] in aggregate.split_dates:
+                continue
+            try:
+                added.append(ledger.record(make_transaction('split', symbol, date=date, ratio=ratio)))
+            except ValueError:
+                # Regroupement rendant une vente ultérieure impossible : saisie manuelle
+                continue
+            aggregate = ledger.aggregates[symbol]
+    return added
@@ -0,0 +1,270 @@
+"""Couche d'accès aux données asynchrone (yfinance, SMTP).
+
+Toutes les requêtes passent par une boucle asyncio dédiée qui applique :
+- un sémaphore global de concurrence et une limite de débit par hôte
+- des retries avec backoff exponentiel et gigue pour les erreurs 429/5xx
+- un disjoncteur par symbole pour ne plus solliciter un symbole en échec
+Des wrappers synchrones permettent de l'utiliser depuis le script Streamlit.
+"""
+import asyncio
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yfinance as yf
+
+MAX_CONCURRENCY = 8
+
+# Débit autorisé par hôte : (requêtes par seconde, rafale)
+HOST_RATE_LIMITS = {
+    'yahoo': (8.0, 16),
+    'smtp': (1.0, 2),
+}
+
+RETRY_ATTEMPTS = 4
+BACKOFF_BASE = 0.5      # secondes
+BACKOFF_MAX = 8.0
+
+BREAKER_THRESHOLD = 3   # échecs consécutifs avant ouverture
+BREAKER_COOLDOWN = 60   # secondes
+
+TRANSIENT_MARKERS = (
+    '429', 'too many requests', 'rate limit', '500', '502', '503', '504', 'timed out', 'timeout',
+    'currently down'
+)
+
+# Exceptions réseau de yfinance (curl_cffi) qui ne dérivent pas des exceptions standard
+TRANSIENT_ERROR_NAMES = ('YFRateLimitError', 'Timeout', 'ConnectionError')
+
+
+class CircuitOpenError(Exception):
+    """Le symbole est temporairement exclu après des échecs répétés"""
+
+
+class DeliveryUncertainError(Exception):
+    """Échec pendant ou après la transmission d'un message : il a pu être remis, pas de nouvel essai"""
+
+
+def is_transient(exc):
+    """Erreur justifiant un nouvel essai (limitation de débit, erreur serveur, réseau)"""
+    if isinstance(exc, DeliveryUncertainError):
+        return False
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, (ConnectionError, TimeoutError, smtplib.SMTPServerDisconnected)):
+        return True
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(exc).__mro__):
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in TRANSIENT_MARKERS)
+
+
+def backoff_delay(attempt):
+    """Backoff exponentiel avec gigue complète"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class RateLimiter:
+    """Seau à jetons (utilisé uniquement depuis la boucle asyncio)"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Disjoncteur par clé (symbole)"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        with self._lock:
+            opened = self._opened_at.get(key)
+            if opened is None:
+                return True
+            # Semi-ouvert : un essai est autorisé après le délai de refroidissement
+            if time.monotonic() - opened >= self.cooldown:
+                del self._opened_at[key]
+                self._failures[key] = self.threshold - 1
+                return True
+            return False
+
+    def record_success(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def record_failure(self, key):
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if failures >= self.threshold:
+                self._opened_at[key] = time.monotonic()
+
+    def open_keys(self):
+        with self._lock:
+            return sorted(self._opened_at)
+
+
+def _raise_yfinance_errors():
+    """yfinance masque par défaut ses erreurs (DataFrame vide journalisé) : on les laisse remonter
+    pour que les retries et le disjoncteur s'appliquent et qu'un résultat vide ne soit pas mis en cache"""
+    config = getattr(yf, 'config', None)
+    if config is not None:
+        config.debug.hide_exceptions = False
+
+
+class DataAccess:
+    """Accès aux données partagé par toutes les sessions d'un processus.
+
+    yfinance réutilise déjà une session HTTP unique (pool de connexions)
+    pour toutes ses requêtes ; les appels bloquants sont exécutés dans un
+    pool de threads borné, orchestré par la boucle asyncio.
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY):
+        _raise_yfinance_errors()
+        self.breaker = CircuitBreaker()
+        self._io = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='data-io')
+        # Pool distinct pour les appels synchrones parallélisés (évite les interblocages avec _io)
+        self._fanout = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix='data-fanout')
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._io)
+        self._thread = threading.Thread(target=self._loop.run_forever, name='data-loop', daemon=True)
+        self._thread.start()
+        self._semaphore = self.run_sync(self._make_semaphore(max_concurrency))
+        self._limiters = {host: RateLimiter(*limits) for host, limits in HOST_RATE_LIMITS.items()}
+
+    @staticmethod
+    async def _make_semaphore(value):
+        return asyncio.Semaphore(value)
+
+    async def _call(self, host, key, fn, *args, **kwargs):
+        """Exécute fn avec limites, retries et disjoncteur"""
+        if key is not None and not self.breaker.allow(key):
+            raise CircuitOpenError(f"{key} temporairement indisponible après plusieurs échecs")
+
+        for attempt in range(RETRY_ATTEMPTS):
+            try:
+                async with self._semaphore:
+                    await self._limiters[host].acquire()
+                    result = await self._loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+            except Exception as exc:
+                if attempt == RETRY_ATTEMPTS - 1 or not is_transient(exc):
+                    if key is not None:
+                        self.breaker.record_failure(key)
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+            else:
+                if key is not None:
+                    self.breaker.record_success(key)
+                return result
+
+    # API asynchrone -----------------------------------------------------------------
+
+    async def history(self, symbol, **kwargs):
+        """Historique yfinance (mêmes paramètres que Ticker.history)"""
+        if getattr(yf, 'config', None) is None:
+            # Versions de yfinance antérieures à yf.config
+            kwargs.setdefault('raise_errors', True)
+        return await self._call('yahoo', symbol, lambda: yf.Ticker(symbol).history(**kwargs))
+
+    async def info(self, symbol):
+        """Informations de l'entreprise"""
+        return await self._call('yahoo', symbol, lambda: yf.Ticker(symbol).info)
+
+    async def fx_rate(self, currency, base='EUR'):
+        """Taux de change base→currency (dernière clôture)"""
+        if currency == base:
+            return 1.0
+        pair = f"{base}{currency}=X"
+        hist = await self._call('yahoo', pair, lambda: yf.Ticker(pair).history(period='5d'))
+        if hist.empty:
+            raise ValueError(f"Taux {pair} indisponible")
+        return float(hist['Close'].iloc[-1])
+
+    async def send_email(self, config, message):
+        """Envoie un message via SMTP (STARTTLS)"""
+        def send():
+            server = smtplib.SMTP(config['smtp_server'], config['smtp_port'], timeout=30)
+            try:
+                server.starttls()
+                server.login(config['email'], config['password'])
+                # Seules la connexion et l'authentification sont réessayées : une fois
+                # DATA transmis, un nouvel essai pourrait envoyer l'alerte en double
+                try:
+                    server.send_message(message)
+                except (smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused):
+                    raise
+                except Exception as exc:
+                    raise DeliveryUncertainError(f"Envoi interrompu, message peut-être remis : {exc}") from exc
+            finally:
+                try:
+                    server.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+            return True
+        return await self._call('smtp', None, send)
+
+    # Wrappers synchrones ------------------------------------------------------------
+
+    def submit(self, coro):
+        """Planifie une coroutine sur la boucle ; retourne un concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run_sync(self, coro, timeout=None):
+        """Exécute une coroutine et attend son résultat"""
+        return self.submit(coro).result(timeout)
+
+    def history_sync(self, symbol, **kwargs):
+        return self.run_sync(self.history(symbol, **kwargs))
+
+    def info_sync(self, symbol):
+        return self.run_sync(self.info(symbol))
+
+    def fx_rate_sync(self, currency, base='EUR'):
+        return self.run_sync(self.fx_rate(currency, base))
+
+    def send_email_sync(self, config, message):
+        return self.run_sync(self.send_email(config, message))
+
+    def submit_call(self, fn, *args):
+        """Exécute une fonction synchrone en arrière-plan ; retourne un Future"""
+        return self._fanout.submit(fn, *args)
+
+    def map(self, fn, items):
+        """Applique une fonction synchrone (ex: un chargeur en cache) en parallèle.
+
+        Retourne {item: résultat ou exception} ; un élément lent ou en échec
+        ne bloque pas les autres.
+        """
+        futures = {item: self._fanout.submit(fn, item) for item in items}
+        results = {}
+        for item, future in futures.items():
+            try:
+                results[item] = future.result()
+            except Exception as exc:
+                results[item] = exc
+        return results
@@ -0,0 +1,106 @@
+"""Représentation compacte des historiques de cours partagée entre les sessions"""
+import numpy as np
+import pandas as pd
+
+# Colonnes conservées (Dividends / Stock Splits sont relevés à part, voir corporate_actions.py)
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+
+
+class CompactHistory:
+    """Historique OHLCV en colonnes NumPy immuables.
+
+    - OHLC en float32, volume en int64
+    - index en epoch int64 (nanosecondes UTC) + nom du fuseau horaire
+    Les tableaux sont en lecture seule : une même instance peut être servie
+    à toutes les sessions sans copie.
+    """
+
+    __slots__ = ('index', 'tz', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, index, tz, open, high, low, close, volume):
+        self.index = index
+        self.tz = tz
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        for arr in (index, open, high, low, close, volume):
+            arr.setflags(write=False)
+
+    @classmethod
+    def empty(cls, tz='UTC'):
+        """Historique vide"""
+        f32 = np.empty(0, dtype=np.float32)
+        return cls(np.empty(0, dtype=np.int64), tz, f32, f32.copy(), f32.copy(), f32.copy(),
+                   np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_frame(cls, df, tz):
+        """Construit un historique compact à partir d'un DataFrame yfinance"""
+        if df is None or df.empty:
+            return cls.empty(tz)
+
+        idx = df.index
+        if idx.tz is None:
+            idx = idx.tz_localize('UTC')
+        # .values d'un index tz-aware renvoie des datetime64[ns] en UTC
+        epoch = np.ascontiguousarray(idx.values.astype('datetime64[ns]').view(np.int64))
+
+        columns = [np.ascontiguousarray(df[col].to_numpy(dtype=np.float32)) for col in PRICE_COLUMNS]
+        volume = np.ascontiguousarray(df['Volume'].fillna(0).to_numpy(dtype=np.int64))
+        return cls(epoch, tz, *columns, volume)
+
+    def __reduce__(self):
+        # Reconstruit via __init__ pour conserver les tableaux en lecture seule
+        return (CompactHistory, (self.index, self.tz, self.open, self.high, self.low, self.close, self.volume))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def is_empty(self):
+        return len(self.index) == 0
+
+    @property
+    def nbytes(self):
+        """Taille mémoire des colonnes (octets)"""
+        return sum(arr.nbytes for arr in (self.index, self.open, self.high, self.low, self.close, self.volume))
+
+    def datetime_index(self):
+        """Index pandas dans le fuseau horaire d'origine"""
+        return pd.DatetimeIndex(self.index.view('datetime64[ns]'), tz='UTC').tz_convert(self.tz)
+
+    def to_frame(self):
+        """Vue DataFrame (mêmes noms de colonnes que yfinance) sans recopier les colonnes"""
+        return pd.DataFrame(
+            {
+                'Open': self.open,
+                'High': self.high,
+                'Low': self.low,
+                'Close': self.close,
+                'Volume': self.volume,
+            },
+            index=self.datetime_index(),
+            copy=False,
+        )
+
+
+def build_panel(histories, field='close'):
+    """Panneau journalier (dates × symboles) d'un champ de plusieurs historiques compacts.
+
+    Les séries sont alignées sur l'union des dates de séance (heure de Paris)
+    puis complétées vers l'avant (volumes manquants à 0) ; une seule barre
+    est gardée par jour.
+    """
+    columns = {}
+    for symbol, compact in histories.items():
+        if compact is None or compact.is_empty:
+            continue
+        dates = compact.datetime_index().tz_localize(None).normalize()
+        series = pd.Series(getattr(compact, field), index=dates)
+        columns[symbol] = series[~series.index.duplicated(keep='last')]
+    if not columns:
+        return pd.DataFrame()
+    panel = pd.DataFrame(columns).sort_index()
+    return panel.fillna(0) if field == 'volume' else panel.ffill()
@@ -0,0 +1,202 @@
+"""Registre de transactions du portefeuille (en ajout seul) avec agrégats incrémentaux"""
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+TRANSACTION_TYPES = ('buy', 'sell', 'dividend', 'split', 'fee')
+
+TRANSACTION_LABELS = {
+    'buy': 'Achat',
+    'sell': 'Vente',
+    'dividend': 'Dividende',
+    'split': 'Division (split)',
+    'fee': 'Frais',
+}
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class PositionAggregate:
+    """Agrégats courants d'un symbole, mis à jour en O(1) par transaction"""
+
+    __slots__ = ('quantity', 'cost_basis', 'realized_pnl', 'dividends', 'fees', 'first_date', 'last_date',
+                 'split_dates', 'count')
+
+    def __init__(self):
+        self.quantity = 0.0
+        self.cost_basis = 0.0       # coût total des actions détenues
+        self.realized_pnl = 0.0     # plus-values réalisées + dividendes - frais
+        self.dividends = 0.0
+        self.fees = 0.0
+        self.first_date = ''
+        self.last_date = ''
+        self.split_dates = set()    # jours des divisions déjà enregistrées
+        self.count = 0
+
+    @property
+    def average_cost(self):
+        return self.cost_basis / self.quantity if self.quantity > 0 else 0.0
+
+    def apply(self, tx):
+        """Applique une transaction ; lève ValueError si elle est incohérente"""
+        kind = tx['type']
+        if kind == 'buy':
+            self.quantity += tx['shares']
+            self.cost_basis += tx['shares'] * tx['price'] + tx.get('amount', 0.0)
+            self.fees += tx.get('amount', 0.0)
+        elif kind == 'sell':
+            if tx['shares'] > self.quantity + 1e-9:
+                raise ValueError(f"Vente de {tx['shares']} {tx['symbol']} pour {self.quantity:g} détenues")
+            average = self.average_cost
+            self.realized_pnl += tx['shares'] * (tx['price'] - average) - tx.get('amount', 0.0)
+            self.fees += tx.get('amount', 0.0)
+            self.cost_basis -= tx['shares'] * average
+            self.quantity -= tx['shares']
+            if self.quantity <= 1e-9:
+                self.quantity = 0.0
+                self.cost_basis = 0.0
+        elif kind == 'dividend':
+            self.dividends += tx['amount']
+            self.realized_pnl += tx['amount']
+        elif kind == 'split':
+            # Le coût total est inchangé, le prix moyen est divisé par le ratio
+            self.quantity *= tx['ratio']
+            self.split_dates.add(tx['date'][:10])
+        elif kind == 'fee':
+            self.fees += tx['amount']
+            self.realized_pnl -= tx['amount']
+        self.first_date = min(self.first_date, tx['date']) if self.first_date else tx['date']
+        self.last_date = max(self.last_date, tx['date'])
+        self.count += 1
+
+
+def make_transaction(kind, symbol, date=None, shares=0.0, price=0.0, amount=0.0, ratio=1.0):
+    """Construit une transaction validée (dictionnaire, comme les positions et alertes)"""
+    if kind not in TRANSACTION_TYPES:
+        raise ValueError(f"Type de transaction inconnu : {kind}")
+    if kind in ('buy', 'sell') and (shares <= 0 or price <= 0):
+        raise ValueError("Le nombre d'actions et le prix doivent être positifs")
+    if kind in ('dividend', 'fee') and amount <= 0:
+        raise ValueError("Le montant doit être positif")
+    if kind == 'split' and ratio <= 0:
+        raise ValueError("Le ratio de division doit être positif")
+    if isinstance(date, datetime):
+        date = date.strftime(DATE_FORMAT)
+    tx = {'type': kind, 'symbol': symbol, 'date': date or datetime.now().strftime(DATE_FORMAT)}
+    if kind in ('buy', 'sell'):
+        tx.update(shares=float(shares), price=float(price), amount=float(amount))
+    elif kind in ('dividend', 'fee'):
+        tx['amount'] = float(amount)
+    else:
+        tx['ratio'] = float(ratio)
+    return tx
+
+
+class Ledger:
+    """Journal de transactions en ajout seul.
+
+    Les agrégats par symbole sont maintenus à chaque enregistrement ; une
+    transaction antidatée (rattrapage) déclenche le rejeu du seul symbole
+    concerné. L'affichage lit directement les agrégats.
+    """
+
+    def __init__(self):
+        self.transactions = []
+        self.aggregates = {}
+        self.version = 0
+        # Identifiant propre à l'instance : un registre vidé ne reprend pas les signatures de l'ancien
+        self.uid = uuid.uuid4().hex
+        self._changes = None
+        self._changes_version = -1
+
+    def __len__(self):
+        return len(self.transactions)
+
+    @property
+    def signature(self):
+        """Identifie l'état du registre (clé des caches de rejeu)"""
+        return (self.uid, self.version)
+
+    def record(self, tx):
+        """Ajoute une transaction et met à jour les agrégats de son symbole"""
+        tx = dict(tx, id=len(self.transactions))
+        aggregate = self.aggregates.get(tx['symbol'])
+        if aggregate is None or tx['date'] >= aggregate.last_date:
+            candidate = aggregate or PositionAggregate()
+            candidate.apply(tx)
+            self.aggregates[tx['symbol']] = candidate
+            self.transactions.append(tx)
+        else:
+            # Rattrapage : rejeu du symbole dans l'ordre chronologique
+            self.transactions.append(tx)
+            try:
+                self.aggregates[tx['symbol']] = self._replay_symbol(tx['symbol'])
+            except ValueError:
+                self.transactions.pop()
+                raise
+        self.version += 1
+        return tx
+
+    def _replay_symbol(self, symbol):
+        aggregate = PositionAggregate()
+        for tx in sorted((t for t in self.transactions if t['symbol'] == symbol),
+                         key=lambda t: (t['date'], t['id'])):
+            aggregate.apply(tx)
+        return aggregate
+
+    def replay(self):
+        """Recalcule tous les agrégats depuis le journal (chargement, rattrapage massif)"""
+        aggregates = {}
+        for tx in sorted(self.transactions, key=lambda t: (t['date'], t['id'])):
+            aggregates.setdefault(tx['symbol'], PositionAggregate()).apply(tx)
+        self.aggregates = aggregates
+        self.version += 1
+
+    def open_positions(self):
+        """{symbole: agrégat} des positions encore détenues"""
+        return {sym: agg for sym, agg in self.aggregates.items() if agg.quantity > 0}
+
+    def holding_changes(self):
+        """Variations de détention datées pour le rejeu de performance.
+
+        Chaque élément {'symbol', 'shares', 'buy_price', 'date'} est un apport
+        (achat, actions issues d'une division à coût nul) ou un retrait (vente,
+        shares négatif au prix de vente). Mis en cache jusqu'à la prochaine
+        transaction.
+        """
+        if self._changes_version == self.version:
+            return self._changes
+        changes = []
+        held = {}
+        for tx in sorted(self.transactions, key=lambda t: (t['date'], t['id'])):
+            kind = tx['type']
+            if kind not in ('buy', 'sell', 'split'):
+                continue
+            if kind == 'split':
+                shares, price = held.get(tx['symbol'], 0.0) * (tx['ratio'] - 1), 0.0
+            elif kind == 'buy':
+                shares, price = tx['shares'], tx['price']
+            else:
+                shares, price = -tx['shares'], tx['price']
+            held[tx['symbol']] = held.get(tx['symbol'], 0.0) + shares
+            changes.append({
+                'symbol': tx['symbol'],
+                'shares': shares,
+                'buy_price': price,
+                'date': pd.Timestamp(tx['date']).normalize(),
+            })
+        self._changes = changes
+        self._changes_version = self.version
+        return changes
+
+    def to_records(self):
+        """Journal sérialisable (liste de dictionnaires)"""
+        return [dict(tx) for tx in self.transactions]
+
+    @classmethod
+    def from_records(cls, records):
+        ledger = cls()
+        ledger.transactions = [dict(tx, id=i) for i, tx in enumerate(records)]
+        ledger.replay()
+        return ledger
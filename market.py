@@ -0,0 +1,166 @@
+"""Constantes et règles de marché partagées (Euronext Paris), sans dépendance à Streamlit"""
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+
+# Configuration des fuseaux horaires
+PARIS_TZ = pytz.timezone('Europe/Paris')
+NY_TZ = pytz.timezone('America/New_York')
+
+# Indice de référence
+BENCHMARK_SYMBOL = '^FCHI'
+
+# Réglages par défaut du tableau de bord
+DEFAULT_SYMBOL = 'MC.PA'
+DEFAULT_PERIOD = '1mo'
+DEFAULT_INTERVAL = '1wk'
+
+# WATCHLIST PAR DÉFAUT AVEC LES BONS SYMBOLES
+DEFAULT_WATCHLIST = (
+    # CAC 40 - Symboles corrects
+    'MC.PA',        # LVMH
+    'OR.PA',        # L'Oréal
+    'AC.PA',        # Crédit Agricole (CORRIGÉ - était ACA.PA)
+    'BNP.PA',       # BNP Paribas
+    'GLE.PA',       # Société Générale
+    'AIR.PA',       # Airbus
+    'SAF.PA',       # Safran
+    'RMS.PA',       # Hermès
+    'SAN.PA',       # Sanofi
+    'TTE.PA',       # TotalEnergies (CORRIGÉ - était TOTF.PA)
+    'SU.PA',        # Schneider Electric
+    'CAP.PA',       # Capgemini
+    'DSY.PA',       # Dassault Systèmes
+    'ENGI.PA',      # Engie
+    'ORAN.PA',      # Orange (CORRIGÉ - était FTE.PA)
+    'VIV.PA',       # Vivendi
+    'VIE.PA',       # Veolia
+    'RNO.PA',       # Renault
+    'STLAP.PA',     # Stellantis
+    'AI.PA',        # Air Liquide
+    'KER.PA',       # Kering
+    'CDI.PA',       # Christian Dior
+    'DG.PA',        # Vinci
+    'LR.PA',        # Legrand
+    'EL.PA',        # EssilorLuxottica
+    'BN.PA',        # Danone
+    'PUB.PA',       # Publicis
+    'SGO.PA',       # Saint-Gobain
+    'ML.PA',        # Michelin
+    'ATO.PA',       # Atos
+    'HO.PA',        # Thales
+    'SW.PA',        # Sodexo
+    'ERF.PA',       # Eramet
+    'DEC.PA',       # JCDecaux
+    'NOKIA.PA',     # Nokia (Paris)
+)
+
+# Noms lisibles des symboles (sélecteur de la barre latérale)
+SYMBOL_NAMES = {
+    'MC.PA': 'LVMH',
+    'OR.PA': "L'Oréal",
+    'AC.PA': 'Crédit Agricole',
+    'BNP.PA': 'BNP Paribas',
+    'GLE.PA': 'Société Générale',
+    'AIR.PA': 'Airbus',
+    'SAF.PA': 'Safran',
+    'RMS.PA': 'Hermès',
+    'SAN.PA': 'Sanofi',
+    'TTE.PA': 'TotalEnergies',
+    'SU.PA': 'Schneider Electric',
+    'CAP.PA': 'Capgemini',
+    'DSY.PA': 'Dassault Systèmes',
+    'ENGI.PA': 'Engie',
+    'ORAN.PA': 'Orange',
+    'VIV.PA': 'Vivendi',
+    'VIE.PA': 'Veolia',
+    'RNO.PA': 'Renault',
+    'STLAP.PA': 'Stellantis',
+    'AI.PA': 'Air Liquide',
+    'KER.PA': 'Kering',
+    'CDI.PA': 'Christian Dior',
+    'DG.PA': 'Vinci',
+    'LR.PA': 'Legrand',
+    'EL.PA': 'EssilorLuxottica',
+    'BN.PA': 'Danone',
+    'PUB.PA': 'Publicis',
+    'SGO.PA': 'Saint-Gobain',
+    'ML.PA': 'Michelin',
+}
+
+# Suffixe Yahoo → (marché, devise)
+LISTING_BY_SUFFIX = {
+    'PA': ('Euronext Paris', 'EUR'),
+    'AS': ('Euronext Amsterdam', 'EUR'),
+    'BR': ('Euronext Brussels', 'EUR'),
+    'L': ('London Stock Exchange', 'GBP'),
+    'MI': ('Borsa Italiana', 'EUR'),
+    'DE': ('Deutsche Börse', 'EUR'),
+}
+DEFAULT_LISTING = ('US/Global', 'USD')
+
+CURRENCY_SIGNS = {'EUR': '€', 'GBP': '£', 'USD': '$'}
+
+# Jours fériés français
+FRENCH_HOLIDAYS_2024 = [
+    '2024-01-01',  # Jour de l'An
+    '2024-04-01',  # Lundi de Pâques
+    '2024-05-01',  # Fête du Travail
+    '2024-05-08',  # Victoire 1945
+    '2024-05-09',  # Ascension
+    '2024-05-20',  # Pentecôte
+    '2024-07-14',  # Fête Nationale
+    '2024-08-15',  # Assomption
+    '2024-11-01',  # Toussaint
+    '2024-11-11',  # Armistice
+    '2024-12-25',  # Noël
+]
+
+
+def get_market_status():
+    """Détermine le statut des marchés français"""
+    paris_now = datetime.now(PARIS_TZ)
+    paris_hour = paris_now.hour
+    paris_minute = paris_now.minute
+    paris_weekday = paris_now.weekday()
+    paris_date = paris_now.strftime('%Y-%m-%d')
+    
+    # Weekend (samedi = 5, dimanche = 6)
+    if paris_weekday >= 5:
+        return "Fermé (weekend)", "🔴"
+    
+    # Jours fériés
+    if paris_date in FRENCH_HOLIDAYS_2024:
+        return "Fermé (jour férié)", "🔴"
+    
+    # Horaires Euronext: 09:00 - 17:30
+    if 9 <= paris_hour < 17:
+        return "Ouvert", "🟢"
+    elif paris_hour == 17 and paris_minute <= 30:
+        return "Ouvert", "🟢"
+    elif 7 <= paris_hour < 9:
+        return "Pré-ouverture", "🟡"
+    elif 17 < paris_hour < 20:
+        return "Après-clôture", "🟡"
+    else:
+        return "Fermé", "🔴"
+
+
+@lru_cache(maxsize=4096)
+def get_listing(symbol):
+    """(marché, devise) d'un symbole, résolu une seule fois par symbole"""
+    _, dot, suffix = symbol.rpartition('.')
+    if not dot:
+        return DEFAULT_LISTING
+    return LISTING_BY_SUFFIX.get(suffix, DEFAULT_LISTING)
+
+
+def get_exchange(symbol):
+    """Détermine l'échange pour un symbole"""
+    return get_listing(symbol)[0]
+
+
+def get_currency(symbol):
+    """Détermine la devise pour un symbole"""
+    return get_listing(symbol)[1]
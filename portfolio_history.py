@@ -0,0 +1,160 @@
+"""Historique de performance du portefeuille par rejeu vectorisé des positions"""
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def _lots_signature(lots):
+    return tuple((lot['symbol'], lot['shares'], lot['buy_price'], lot['date']) for lot in lots)
+
+
+def replay_values(lots, panel):
+    """Valeur et coût journaliers : matrice de détention × panneau de clôtures.
+
+    lots : variations de détention {'symbol', 'shares', 'buy_price', 'date'}
+    (shares négatif pour une vente). Les variations sont ventilées sur la
+    grille des dates puis cumulées, ce qui donne une matrice symboles × dates
+    quel que soit le nombre de transactions. Retourne un DataFrame indexé par
+    les dates du panneau avec les colonnes 'Valeur', 'Coût' (apports nets,
+    éventuellement négatifs après une vente en plus-value) et 'Actions'
+    (nombre total d'actions détenues, qui détermine les jours actifs).
+    """
+    dates = panel.index.values.astype('datetime64[D]')
+    if not lots or panel.empty:
+        return pd.DataFrame({'Valeur': 0.0, 'Coût': 0.0, 'Actions': 0.0}, index=panel.index)
+
+    columns = {symbol: i for i, symbol in enumerate(panel.columns)}
+    lots = [lot for lot in lots if lot['symbol'] in columns]
+    symbol_idx = np.array([columns[lot['symbol']] for lot in lots], dtype=np.intp)
+    shares = np.array([lot['shares'] for lot in lots], dtype=np.float64)
+    buy_price = np.array([lot['buy_price'] for lot in lots], dtype=np.float64)
+    lot_dates = np.array([lot['date'].to_datetime64() for lot in lots]).astype('datetime64[D]')
+
+    # Première clôture à laquelle chaque variation est prise en compte
+    date_pos = np.searchsorted(dates, lot_dates, side='left')
+
+    # holdings[s, t] = nombre d'actions du symbole s détenues à la clôture t
+    deltas = np.zeros((len(columns), len(dates) + 1))
+    np.add.at(deltas, (symbol_idx, date_pos), shares)
+    holdings = np.cumsum(deltas[:, :-1], axis=1)
+
+    flows = np.zeros(len(dates) + 1)
+    np.add.at(flows, date_pos, shares * buy_price)
+    cost = np.cumsum(flows[:-1])
+
+    prices = np.nan_to_num(panel.to_numpy(dtype=np.float64).T)    # symboles × dates
+    value = np.einsum('sd,sd->d', holdings, prices)
+    return pd.DataFrame({'Valeur': value, 'Coût': cost, 'Actions': holdings.sum(axis=0)}, index=panel.index)
+
+
+def derive_curves(values, start_level=1.0, start_peak=1.0, prev_value=None, prev_cost=None):
+    """Rendements pondérés dans le temps, indice cumulé et drawdown.
+
+    Les achats sont traités comme des apports (flux = variation du coût),
+    de sorte qu'un nouveau lot n'apparaît pas comme une performance.
+    Les paramètres start_* permettent de prolonger une courbe existante.
+    """
+    value = values['Valeur'].to_numpy()
+    cost = values['Coût'].to_numpy()
+    before_value = np.concatenate([[value[0] if prev_value is None else prev_value], value[:-1]])
+    before_cost = np.concatenate([[cost[0] if prev_cost is None else prev_cost], cost[:-1]])
+    flows = cost - before_cost
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(before_value > 0, (value - flows) / before_value - 1.0, 0.0)
+    returns = np.nan_to_num(returns)
+
+    level = start_level * np.cumprod(1.0 + returns)
+    peak = np.maximum.accumulate(np.concatenate([[start_peak], level]))[1:]
+
+    curves = values.copy()
+    curves['P&L'] = value - cost
+    curves['Rendement'] = returns
+    curves['Indice'] = level
+    curves['Drawdown'] = level / peak - 1.0
+    return curves
+
+
+def active_days(curves):
+    """Masque des jours où des actions sont détenues (le coût net peut être nul ou négatif)"""
+    return curves['Actions'] > 1e-9
+
+
+def performance_stats(curves):
+    """Volatilité, Sharpe (taux sans risque nul), drawdown max et performance totale"""
+    active = curves[active_days(curves)]
+    if len(active) < 2:
+        return {'volatility': 0.0, 'sharpe': 0.0, 'max_drawdown': 0.0, 'total_return': 0.0}
+    returns = active['Rendement'].to_numpy()[1:]
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    return {
+        'volatility': float(std * np.sqrt(TRADING_DAYS)),
+        'sharpe': float(returns.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else 0.0,
+        'max_drawdown': float(active['Drawdown'].min()),
+        'total_return': float(active['Indice'].iloc[-1] / active['Indice'].iloc[0] - 1.0),
+    }
+
+
+def benchmark_curve(curves, benchmark):
+    """Indice de référence (ex: CAC 40) rebasé sur l'indice du portefeuille au premier achat"""
+    active = curves.index[active_days(curves)]
+    if benchmark is None or benchmark.empty or not len(active):
+        return pd.Series(dtype=float)
+    aligned = benchmark.reindex(curves.index).ffill().loc[active[0]:]
+    base = aligned.dropna()
+    if base.empty:
+        return pd.Series(dtype=float)
+    return aligned / base.iloc[0] * curves.loc[base.index[0], 'Indice']
+
+
+class PortfolioReplay:
+    """Cache incrémental du rejeu.
+
+    Tant que les lots ne changent pas et que le panneau recouvre la fin des
+    courbes existantes, seules les dates nouvelles (et la dernière, encore
+    ouverte) sont recalculées puis ajoutées. Le début du panneau peut avancer
+    d'un jour à l'autre (fenêtre glissante) sans forcer un recalcul complet.
+    """
+
+    def __init__(self):
+        self._signature = None
+        self.curves = None
+
+    def update(self, lots, panel, signature=None):
+        """Courbes à jour ; signature identifie l'état des lots (ex: version du registre)"""
+        signature = _lots_signature(lots) if signature is None else signature
+        previous = self.curves
+        overlap = self._overlap(previous, panel) if signature == self._signature else -1
+        if overlap < 0:
+            self.curves = derive_curves(replay_values(lots, panel)) if not panel.empty else None
+            self._signature = signature
+            return self.curves
+
+        # Recalcul à partir de la dernière ligne (barre du jour potentiellement modifiée)
+        kept = previous.iloc[:-1]
+        tail = replay_values(lots, panel.iloc[overlap + 1:])
+        last = kept.iloc[-1]
+        new_rows = derive_curves(
+            tail,
+            start_level=last['Indice'],
+            start_peak=kept['Indice'].max(),
+            prev_value=last['Valeur'],
+            prev_cost=last['Coût'],
+        )
+        self.curves = pd.concat([kept, new_rows])
+        return self.curves
+
+    @staticmethod
+    def _overlap(previous, panel):
+        """Position dans le panneau de la dernière date conservée, ou -1 si les dates divergent"""
+        if previous is None or len(previous) < 2 or panel.empty:
+            return -1
+        kept_index = previous.index[:-1]
+        pos = panel.index.get_indexer([kept_index[-1]])[0]
+        if pos < 0 or pos + 1 > len(kept_index) or pos + 1 >= len(panel):
+            return -1
+        # Les dates communes doivent être identiques (aucune séance insérée ou retirée)
+        if not panel.index[:pos + 1].equals(kept_index[-(pos + 1):]):
+            return -1
+        return pos
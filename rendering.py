@@ -0,0 +1,95 @@
+"""Formatage par colonnes et composants groupés pour les boucles de rendu"""
+import html
+
+import numpy as np
+import pandas as pd
+
+from market import CURRENCY_SIGNS, get_currency
+
+
+def currency_sign(symbol):
+    """Symbole monétaire (€, £, $) d'un symbole boursier"""
+    return CURRENCY_SIGNS[get_currency(symbol)]
+
+
+def format_currency(value, symbol):
+    """Formate la monnaie selon le symbole"""
+    return f"{currency_sign(symbol)}{value:,.2f}"
+
+
+def format_currency_column(values, symbols):
+    """Formate une colonne de montants ; la devise est résolue une fois par symbole distinct"""
+    symbols = np.asarray(symbols, dtype=object)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return np.empty(0, dtype=object)
+    unique, inverse = np.unique(symbols, return_inverse=True)
+    signs = np.array([currency_sign(sym) for sym in unique], dtype=object)[inverse]
+    amounts = np.array([f"{v:,.2f}" for v in values.tolist()], dtype=object)
+    return signs + amounts
+
+
+def watchlist_quotes(symbols, histories):
+    """Dernier cours et variation de chaque symbole, calculés en une passe vectorisée.
+
+    histories : {symbole: CompactHistory ou exception} ; un symbole absent est "en attente"
+    """
+    count = len(symbols)
+    price = np.full(count, np.nan)
+    previous = np.full(count, np.nan)
+    status = np.full(count, 'empty', dtype=object)
+
+    for i, sym in enumerate(symbols):
+        compact = histories.get(sym)
+        if compact is None:
+            status[i] = 'pending'
+            continue
+        if isinstance(compact, Exception):
+            status[i] = 'error'
+            continue
+        if len(compact) >= 1:
+            price[i] = compact.close[-1]
+            status[i] = 'single'
+        if len(compact) >= 2:
+            previous[i] = compact.close[-2]
+            status[i] = 'ok'
+
+    change = price - previous
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = change / previous * 100
+
+    quotes = pd.DataFrame(
+        {'price': price, 'change': change, 'change_pct': change_pct, 'status': status},
+        index=pd.Index(symbols, name='symbol'),
+    )
+    quotes['price_text'] = ''
+    has_price = quotes['status'].isin(['ok', 'single']).to_numpy()
+    quotes.loc[has_price, 'price_text'] = format_currency_column(price[has_price], quotes.index[has_price])
+    return quotes
+
+
+def render_watchlist_html(quotes, cols_per_row=4):
+    """Grille HTML de la watchlist : un seul élément envoyé au navigateur au lieu d'un st.metric par tuile"""
+    tiles = []
+    for sym, row in zip(quotes.index, quotes.itertuples(index=False)):
+        name = html.escape(sym.replace('.PA', ''))
+        if row.status == 'ok':
+            css = 'stock-change-positive' if row.change >= 0 else 'stock-change-negative'
+            arrow = '▲' if row.change >= 0 else '▼'
+            delta = f"<div class='{css}'>{arrow} {row.change:.2f} ({row.change_pct:.1f}%)</div>"
+            price = row.price_text
+        elif row.status == 'single':
+            delta = ''
+            price = row.price_text
+        else:
+            delta = ''
+            price = {'error': 'Err', 'pending': '…'}.get(row.status, 'N/A')
+        tiles.append(
+            f"<div class='watchlist-tile'><div class='watchlist-name'>{name}</div>"
+            f"<div class='watchlist-price'>{html.escape(price)}</div>{delta}</div>"
+        )
+    return (
+        f"<div class='watchlist-grid' style='grid-template-columns: repeat({cols_per_row}, 1fr);'>"
+        + ''.join(tiles)
+        + "</div>"
+    )
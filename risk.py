@@ -0,0 +1,176 @@
+"""Analyse de risque vectorisée : VaR/CVaR, bêta glissant, corrélations, contributions.
+
+Tous les calculs portent sur une matrice de rendements journaliers
+(dates × symboles) construite une seule fois à partir du panneau de
+clôtures : aucune boucle par symbole.
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# Fenêtres d'observation (séances) pour la VaR et le bêta glissant
+VAR_WINDOWS = (60, 120, 250)
+BETA_WINDOWS = (20, 60, 120)
+
+# Nombre minimal de rendements pour inclure un symbole
+MIN_OBSERVATIONS = 20
+
+
+def returns_matrix(close, min_observations=MIN_OBSERVATIONS):
+    """Rendements simples (dates × symboles) sur la plage commune.
+
+    Les symboles ayant trop peu d'historique sont écartés, puis seules les
+    séances où tous les cours restants sont connus sont conservées (le
+    panneau est déjà prolongé vers l'avant, il ne reste que les débuts
+    de cotation).
+    """
+    returns = close.pct_change(fill_method=None).iloc[1:]
+    returns = returns.loc[:, returns.notna().sum() >= min_observations]
+    return returns.dropna()
+
+
+def historical_var(returns, confidence=0.95):
+    """VaR et CVaR historiques (pertes positives) par colonne d'une matrice T × N"""
+    losses = -np.asarray(returns, dtype=np.float64)
+    var = np.quantile(losses, confidence, axis=0)
+    tail = losses >= var
+    with np.errstate(invalid='ignore'):
+        cvar = (losses * tail).sum(axis=0) / tail.sum(axis=0)
+    return var, cvar
+
+
+def parametric_var(returns, confidence=0.95):
+    """VaR et CVaR gaussiennes (moyenne et écart-type empiriques) par colonne"""
+    returns = np.asarray(returns, dtype=np.float64)
+    mu = returns.mean(axis=0)
+    sigma = returns.std(axis=0, ddof=1)
+    normal = NormalDist()
+    z = normal.inv_cdf(confidence)
+    var = sigma * z - mu
+    cvar = sigma * normal.pdf(z) / (1 - confidence) - mu
+    return var, cvar
+
+
+def rolling_beta(returns, benchmark, window):
+    """Bêta glissant de chaque colonne contre l'indice, par sommes cumulées.
+
+    returns : matrice T × N ; benchmark : vecteur T. Retourne une matrice
+    (T - window + 1) × N, la ligne i couvrant les séances i .. i+window-1.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    y = np.asarray(benchmark, dtype=np.float64)
+    if len(y) < window:
+        return np.empty((0, x.shape[1]))
+
+    def window_sums(a):
+        c = np.cumsum(np.concatenate([np.zeros((1,) + a.shape[1:]), a]), axis=0)
+        return c[window:] - c[:-window]
+
+    sum_x = window_sums(x)
+    sum_y = window_sums(y)
+    sum_xy = window_sums(x * y[:, None])
+    sum_yy = window_sums(y * y)
+    cov = sum_xy - sum_x * (sum_y / window)[:, None]
+    var = sum_yy - sum_y * sum_y / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(var[:, None] > 0, cov / var[:, None], np.nan)
+
+
+def covariance_matrix(returns):
+    """Matrice de covariance (produit matriciel des rendements centrés)"""
+    x = np.asarray(returns, dtype=np.float64)
+    centered = x - x.mean(axis=0)
+    return centered.T @ centered / (len(x) - 1)
+
+
+def correlation_matrix(cov):
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nan_to_num(cov / np.outer(std, std))
+
+
+def risk_contributions(cov, weights):
+    """Volatilité du portefeuille, contributions marginales et en part du risque"""
+    weights = np.asarray(weights, dtype=np.float64)
+    sigma = float(np.sqrt(weights @ cov @ weights))
+    if sigma == 0:
+        zeros = np.zeros_like(weights)
+        return sigma, zeros, zeros
+    marginal = cov @ weights / sigma
+    share = weights * marginal / sigma
+    return sigma, marginal, share
+
+
+def risk_report(close, benchmark_symbol, weights=None, confidence=0.95,
+                var_windows=VAR_WINDOWS, beta_windows=BETA_WINDOWS):
+    """Analyse complète d'un univers de symboles.
+
+    close : panneau de clôtures (dates × symboles) contenant l'indice de
+    référence ; weights : {symbole: poids} (équipondéré si None). Les
+    poids sont renormalisés sur les symboles ayant assez d'historique.
+    Retourne un dictionnaire de DataFrames prêts à afficher.
+    """
+    returns = returns_matrix(close)
+    if benchmark_symbol not in returns.columns:
+        raise ValueError(f"Historique de {benchmark_symbol} insuffisant")
+    bench = returns.pop(benchmark_symbol)
+    if returns.empty or len(returns) < MIN_OBSERVATIONS:
+        raise ValueError("Historique commun insuffisant pour l'analyse de risque")
+
+    symbols = returns.columns
+    if weights is None:
+        w = np.full(len(symbols), 1.0 / len(symbols))
+    else:
+        w = np.array([weights.get(sym, 0.0) for sym in symbols], dtype=np.float64)
+        if w.sum() <= 0:
+            raise ValueError("Aucun poids positif dans l'univers analysé")
+        w = w / w.sum()
+
+    x = returns.to_numpy()
+    portfolio = x @ w
+    # Colonnes : symboles puis portefeuille, évaluées d'un seul bloc
+    augmented = np.column_stack([x, portfolio])
+    labels = list(symbols) + ['Portefeuille']
+
+    var_rows = {}
+    for window in var_windows:
+        if len(augmented) < window:
+            continue
+        recent = augmented[-window:]
+        h_var, h_cvar = historical_var(recent, confidence)
+        p_var, p_cvar = parametric_var(recent, confidence)
+        var_rows[window] = pd.DataFrame({
+            'VaR hist.': h_var, 'CVaR hist.': h_cvar,
+            'VaR param.': p_var, 'CVaR param.': p_cvar,
+        }, index=labels)
+
+    betas = {}
+    for window in beta_windows:
+        rolling = rolling_beta(augmented, bench.to_numpy(), window)
+        if len(rolling):
+            betas[window] = pd.DataFrame(rolling, index=returns.index[window - 1:], columns=labels)
+
+    cov = covariance_matrix(x)
+    sigma, marginal, share = risk_contributions(cov, w)
+    annual = np.sqrt(TRADING_DAYS)
+    contributions = pd.DataFrame({
+        'Poids': w,
+        'Volatilité (an.)': np.sqrt(np.diag(cov)) * annual,
+        'Contribution marginale': marginal * annual,
+        'Part du risque': share,
+    }, index=symbols)
+
+    return {
+        'observations': len(returns),
+        'start': returns.index[0],
+        'end': returns.index[-1],
+        'excluded': sorted(set(close.columns) - set(symbols) - {benchmark_symbol}),
+        'volatility': sigma * annual,
+        'var': var_rows,
+        'beta': betas,
+        'correlation': pd.DataFrame(correlation_matrix(cov), index=symbols, columns=symbols),
+        'contributions': contributions,
+    }
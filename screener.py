@@ -0,0 +1,199 @@
+"""Screener : conditions déclaratives évaluées sur un panneau d'historiques"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Au-delà de ce nombre de symboles, l'évaluation est répartie sur un pool de processus
+SHARD_THRESHOLD = 200
+
+FIELD_LABELS = {
+    'close': 'Cours',
+    'change_pct': 'Variation %',
+    'ma20': 'MA 20',
+    'ma50': 'MA 50',
+    'dist_ma50_pct': 'Écart MA 50 %',
+    'volume': 'Volume',
+    'volume_avg20': 'Volume moyen 20j',
+    'volume_spike': 'Pic de volume (x)',
+    'rsi14': 'RSI 14',
+}
+
+OPERATORS = ('>', '>=', '<', '<=', 'crosses_above', 'crosses_below')
+
+# Conditions prédéfinies (même format que les alertes : des dictionnaires)
+PRESET_SCREENS = {
+    "Croisement MA 50 à la hausse": {
+        'conditions': [{'field': 'close', 'op': 'crosses_above', 'value': 'ma50'}],
+        'rank_by': 'change_pct',
+    },
+    "Croisement MA 50 à la baisse": {
+        'conditions': [{'field': 'close', 'op': 'crosses_below', 'value': 'ma50'}],
+        'rank_by': 'change_pct',
+    },
+    "Pics de volume": {
+        'conditions': [{'field': 'volume_spike', 'op': '>', 'value': 2.0}],
+        'rank_by': 'volume_spike',
+    },
+    "Plus fortes hausses": {
+        'conditions': [{'field': 'change_pct', 'op': '>', 'value': 0.0}],
+        'rank_by': 'change_pct',
+    },
+    "Survente (RSI < 30)": {
+        'conditions': [{'field': 'rsi14', 'op': '<', 'value': 30.0}],
+        'rank_by': 'rsi14',
+    },
+}
+
+_executor = None
+
+
+def validate_condition(condition):
+    """Vérifie une condition {'field', 'op', 'value'} ; lève ValueError si invalide"""
+    if condition.get('field') not in FIELD_LABELS:
+        raise ValueError(f"Champ inconnu : {condition.get('field')}")
+    if condition.get('op') not in OPERATORS:
+        raise ValueError(f"Opérateur inconnu : {condition.get('op')}")
+    value = condition.get('value')
+    if isinstance(value, str) and value not in FIELD_LABELS:
+        raise ValueError(f"Champ de comparaison inconnu : {value}")
+
+
+def _rsi(close, window=14):
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    rs = gain / loss.replace(0, np.nan)
+    return 100 - 100 / (1 + rs)
+
+
+class _Features:
+    """Indicateurs calculés à la demande, chacun sur tout le panneau à la fois"""
+
+    def __init__(self, close, volume):
+        self.close = close
+        self.volume = volume
+        self._cache = {}
+
+    def __getitem__(self, field):
+        if field not in self._cache:
+            self._cache[field] = self._compute(field)
+        return self._cache[field]
+
+    def _compute(self, field):
+        if field == 'close':
+            return self.close
+        if field == 'volume':
+            return self.volume
+        if field == 'change_pct':
+            return self.close.pct_change() * 100
+        if field == 'ma20':
+            return self.close.rolling(window=20).mean()
+        if field == 'ma50':
+            return self.close.rolling(window=50).mean()
+        if field == 'dist_ma50_pct':
+            return (self.close / self['ma50'] - 1) * 100
+        if field == 'volume_avg20':
+            # Moyenne des 20 séances précédentes (hors séance courante)
+            return self.volume.rolling(window=20).mean().shift(1)
+        if field == 'volume_spike':
+            return self.volume / self['volume_avg20'].replace(0, np.nan)
+        if field == 'rsi14':
+            return _rsi(self.close)
+        raise ValueError(f"Champ inconnu : {field}")
+
+
+def _operand(features, value, row):
+    if isinstance(value, str):
+        return features[value].iloc[row]
+    return value
+
+
+def _evaluate_shard(conditions, rank_by, close, volume):
+    """Évalue les conditions sur la dernière séance d'un sous-ensemble de symboles"""
+    features = _Features(close, volume)
+    mask = pd.Series(True, index=close.columns)
+
+    for condition in conditions:
+        field, op, value = condition['field'], condition['op'], condition['value']
+        now = features[field].iloc[-1]
+        other_now = _operand(features, value, -1)
+        if op in ('crosses_above', 'crosses_below'):
+            if len(close) < 2:
+                mask &= False
+                continue
+            before = features[field].iloc[-2]
+            other_before = _operand(features, value, -2)
+            if op == 'crosses_above':
+                mask &= (before <= other_before) & (now > other_now)
+            else:
+                mask &= (before >= other_before) & (now < other_now)
+        elif op == '>':
+            mask &= now > other_now
+        elif op == '>=':
+            mask &= now >= other_now
+        elif op == '<':
+            mask &= now < other_now
+        else:
+            mask &= now <= other_now
+
+    shown = ['close', 'change_pct']
+    for condition in conditions:
+        for field in (condition['field'], condition['value']):
+            if isinstance(field, str) and field not in shown:
+                shown.append(field)
+    if rank_by not in shown:
+        shown.append(rank_by)
+
+    result = pd.DataFrame({field: features[field].iloc[-1] for field in shown})
+    return result[mask.fillna(False).astype(bool)]
+
+
+def _shards(columns, count):
+    return [chunk for chunk in np.array_split(np.asarray(columns), count) if len(chunk)]
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # 'spawn' : pas de fork d'un serveur qui exécute déjà une boucle asyncio et des pools de threads
+        _executor = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 2,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _executor
+
+
+def screen(conditions, close, volume, rank_by='change_pct', ascending=False, top=None):
+    """Symboles satisfaisant toutes les conditions, classés selon rank_by.
+
+    close et volume sont des panneaux journaliers (dates × symboles). Les
+    indicateurs sont vectorisés sur toutes les colonnes ; pour les grands
+    univers, les colonnes sont réparties en lots évalués en parallèle.
+    """
+    for condition in conditions:
+        validate_condition(condition)
+    if rank_by not in FIELD_LABELS:
+        raise ValueError(f"Champ de classement inconnu : {rank_by}")
+    if close.empty:
+        return pd.DataFrame(columns=[FIELD_LABELS['close']])
+
+    volume = volume.reindex(index=close.index, columns=close.columns).fillna(0)
+
+    if close.shape[1] <= SHARD_THRESHOLD:
+        result = _evaluate_shard(conditions, rank_by, close, volume)
+    else:
+        executor = _get_executor()
+        shards = _shards(close.columns, os.cpu_count() or 2)
+        futures = [
+            executor.submit(_evaluate_shard, conditions, rank_by, close[cols], volume[cols])
+            for cols in shards
+        ]
+        result = pd.concat([future.result() for future in futures])
+
+    result = result.sort_values(rank_by, ascending=ascending)
+    if top:
+        result = result.head(top)
+    return result.rename(columns=FIELD_LABELS)
@@ -0,0 +1,198 @@
+"""État utilisateur des sessions, borné en mémoire.
+
+Chaque onglet n'est identifié dans st.session_state que par un identifiant,
+lié à sa connexion Streamlit ; ses données (watchlist, registre, alertes, notifications) vivent dans un
+registre partagé par le processus. Les sessions inactives sont écrites
+dans un fichier SQLite puis retirées de la mémoire, et rechargées
+de façon transparente au retour de l'utilisateur : la mémoire du serveur
+dépend des sessions actives, pas de toutes celles ouvertes un jour.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from bar_archive import DEFAULT_DATA_DIR
+from ledger import Ledger
+from market import DEFAULT_WATCHLIST
+from portfolio_history import PortfolioReplay
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SESSION_DB_PATH = os.path.join(DEFAULT_DATA_DIR, 'sessions.db')
+
+# Inactivité (secondes) au-delà de laquelle une session est déchargée
+IDLE_TIMEOUT = 15 * 60
+
+# Nombre maximal de sessions gardées en mémoire
+MAX_ACTIVE_SESSIONS = 200
+
+# Notifications conservées par session
+MAX_NOTIFICATIONS = 50
+
+
+class UserSession:
+    """Données d'un onglet.
+
+    La watchlist référence le tuple partagé DEFAULT_WATCHLIST tant que
+    l'utilisateur ne la modifie pas (copie à l'écriture : un ajout crée un
+    nouveau tuple).
+    """
+
+    __slots__ = ('watchlist', 'ledger', 'price_alerts', 'notifications', 'portfolio_replay', 'owner', 'last_seen')
+
+    def __init__(self, watchlist=DEFAULT_WATCHLIST, ledger=None, price_alerts=None, notifications=()):
+        self.watchlist = watchlist
+        self.ledger = ledger or Ledger()
+        self.price_alerts = price_alerts or []
+        self.notifications = deque(notifications, maxlen=MAX_NOTIFICATIONS)
+        # Cache de calcul, reconstruit après un rechargement
+        self.portfolio_replay = PortfolioReplay()
+        # Connexion Streamlit qui utilise la session (non persistée)
+        self.owner = None
+        self.last_seen = time.monotonic()
+
+    def add_to_watchlist(self, symbol):
+        if symbol not in self.watchlist:
+            self.watchlist = self.watchlist + (symbol,)
+
+    def to_records(self):
+        """État sérialisable (la watchlist par défaut n'est pas recopiée)"""
+        return {
+            'watchlist': None if self.watchlist == DEFAULT_WATCHLIST else list(self.watchlist),
+            'ledger': self.ledger.to_records(),
+            'price_alerts': self.price_alerts,
+            'notifications': list(self.notifications),
+        }
+
+    @classmethod
+    def from_records(cls, records):
+        watchlist = records.get('watchlist')
+        return cls(
+            watchlist=DEFAULT_WATCHLIST if watchlist is None else tuple(watchlist),
+            ledger=Ledger.from_records(records.get('ledger', [])),
+            price_alerts=records.get('price_alerts', []),
+            notifications=records.get('notifications', ()),
+        )
+
+
+class SessionStore:
+    """Sessions déchargées, dans un fichier SQLite (WAL) partagé par les processus"""
+
+    def __init__(self, path=SESSION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, payload TEXT, updated REAL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, session_id, records):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (id, payload, updated) VALUES (?, ?, ?)",
+            (session_id, json.dumps(records, default=str), time.time())
+        )
+
+    def load(self, session_id):
+        row = self._conn().execute("SELECT payload FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class SessionRegistry:
+    """Sessions actives du processus, triées de la moins à la plus récemment utilisée"""
+
+    def __init__(self, store, idle_timeout=IDLE_TIMEOUT, max_active=MAX_ACTIVE_SESSIONS):
+        self.store = store
+        self.idle_timeout = idle_timeout
+        self.max_active = max_active
+        self.evicted = 0
+        self._active = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id, owner):
+        """Session de l'onglet pour la connexion owner.
+
+        Une session déchargée est rechargée depuis le stockage. Retourne None
+        si la session est en cours d'utilisation par une autre connexion
+        (onglet dupliqué, lien copié) : l'appelant doit alors en créer une
+        nouvelle. Le rechargement et l'écriture des sessions déchargées se
+        font sous le verrou, si bien qu'une session n'existe jamais en deux
+        exemplaires.
+        """
+        with self._lock:
+            now = time.monotonic()
+            session = self._active.get(session_id)
+            if session is None:
+                records = self.store.load(session_id)
+                session = UserSession() if records is None else UserSession.from_records(records)
+                self._active[session_id] = session
+            elif session.owner not in (None, owner) and now - session.last_seen < self.idle_timeout:
+                return None
+            session.owner = owner
+            session.last_seen = now
+            self._active.move_to_end(session_id)
+            for evicted_id, evicted_session in self._pop_evictable():
+                self.store.save(evicted_id, evicted_session.to_records())
+        return session
+
+    def _pop_evictable(self):
+        evicted = []
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._active:
+            session_id, session = next(iter(self._active.items()))
+            if session.last_seen >= cutoff and len(self._active) <= self.max_active:
+                break
+            del self._active[session_id]
+            evicted.append((session_id, session))
+        self.evicted += len(evicted)
+        return evicted
+
+    def flush(self):
+        """Écrit toutes les sessions actives (arrêt du serveur)"""
+        with self._lock:
+            sessions = list(self._active.items())
+        for session_id, session in sessions:
+            self.store.save(session_id, session.to_records())
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._active.values())
+        return {
+            'active': len(sessions),
+            'evicted': self.evicted,
+            'stored': self.store.count(),
+            'transactions': sum(len(s.ledger) for s in sessions),
+            'custom_watchlists': sum(s.watchlist is not DEFAULT_WATCHLIST for s in sessions),
+        }
+
+
+def process_rss():
+    """Mémoire résidente du processus (octets), ou None si indisponible"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+    if resource is None:
+        return None
+    # Hors Linux : pic de mémoire (octets sous macOS)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -0,0 +1,164 @@
+"""Instantané précalculé de l'état par défaut du tableau de bord.
+
+Un nouveau visiteur voit immédiatement la page par défaut (MC.PA, 1mo, 1wk,
+watchlist, statut du marché, résumé CAC 40) à partir de cet instantané,
+pendant que les données fraîches sont chargées en arrière-plan.
+
+Usage :
+    python snapshot.py            # construit un instantané et quitte
+    python snapshot.py --loop     # reconstruit en séance et après la clôture d'Euronext
+"""
+import argparse
+import asyncio
+import os
+import pickle
+import time
+from datetime import datetime, timedelta
+
+from bar_archive import DEFAULT_DATA_DIR
+from data_access import DataAccess
+from history_store import CompactHistory
+from market import (
+    PARIS_TZ, BENCHMARK_SYMBOL, DEFAULT_SYMBOL, DEFAULT_PERIOD, DEFAULT_INTERVAL,
+    DEFAULT_WATCHLIST, FRENCH_HOLIDAYS_2024, get_market_status
+)
+
+SNAPSHOT_PATH = os.path.join(DEFAULT_DATA_DIR, 'snapshot.pkl')
+SNAPSHOT_VERSION = 1
+
+# Au-delà, l'instantané n'est plus servi
+SNAPSHOT_MAX_AGE = 24 * 3600
+
+# Reconstruction pendant la séance (secondes)
+SESSION_REFRESH = 300
+
+# Clés de .info affichées sur la page (le reste n'est pas conservé)
+INFO_KEYS = (
+    'longName', 'sector', 'industry', 'website', 'marketCap',
+    'trailingPE', 'dividendYield', 'beta'
+)
+
+
+def index_summary(closes):
+    """Dernier cours et variation d'un indice à partir de ses clôtures"""
+    if len(closes) < 2:
+        return None
+    last = float(closes[-1])
+    previous = float(closes[-2])
+    return {
+        'last': last,
+        'change': last - previous,
+        'change_pct': (last - previous) / previous * 100 if previous else 0.0,
+    }
+
+
+async def _fetch_all(data):
+    symbols = [DEFAULT_SYMBOL, BENCHMARK_SYMBOL] + [s for s in DEFAULT_WATCHLIST]
+    periods = [(DEFAULT_PERIOD, DEFAULT_INTERVAL), ('5d', '1d')] + [('2d', '1d')] * len(DEFAULT_WATCHLIST)
+    tasks = [data.history(sym, period=p, interval=i) for sym, (p, i) in zip(symbols, periods)]
+    tasks.append(data.info(DEFAULT_SYMBOL))
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def build_snapshot(data=None):
+    """Télécharge (en parallèle) et assemble l'état par défaut"""
+    data = data or DataAccess()
+    results = data.run_sync(_fetch_all(data))
+    default_hist, benchmark_hist = results[0], results[1]
+    watchlist_hists = results[2:-1]
+    info = results[-1]
+
+    if isinstance(default_hist, Exception):
+        raise default_hist
+
+    watchlist = {}
+    for sym, hist in zip(DEFAULT_WATCHLIST, watchlist_hists):
+        if not isinstance(hist, Exception):
+            watchlist[sym] = CompactHistory.from_frame(hist, PARIS_TZ.zone)
+
+    cac40 = None
+    if not isinstance(benchmark_hist, Exception):
+        cac40 = index_summary(benchmark_hist['Close'].to_numpy())
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'built_at': time.time(),
+        'symbol': DEFAULT_SYMBOL,
+        'period': DEFAULT_PERIOD,
+        'interval': DEFAULT_INTERVAL,
+        'history': CompactHistory.from_frame(default_hist, PARIS_TZ.zone),
+        'info': {} if isinstance(info, Exception) else {k: info[k] for k in INFO_KEYS if k in info},
+        'watchlist': watchlist,
+        'market_status': get_market_status(),
+        'cac40': cac40,
+    }
+
+
+def write_snapshot(snapshot, path=SNAPSHOT_PATH):
+    """Écrit l'instantané de façon atomique"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def read_snapshot(path=SNAPSHOT_PATH, max_age=SNAPSHOT_MAX_AGE):
+    """Instantané valide et suffisamment récent, ou None"""
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    if time.time() - snapshot['built_at'] > max_age:
+        return None
+    return snapshot
+
+
+def next_build_delay(now=None):
+    """Secondes avant la prochaine reconstruction.
+
+    Toutes les SESSION_REFRESH secondes entre 09:00 et 17:30, puis une fois
+    après la clôture (17:45) ; rien le week-end et les jours fériés.
+    """
+    now = now or datetime.now(PARIS_TZ)
+    opening = now.replace(hour=9, minute=0, second=0, microsecond=0)
+    close_build = now.replace(hour=17, minute=45, second=0, microsecond=0)
+    trading_day = now.weekday() < 5 and now.strftime('%Y-%m-%d') not in FRENCH_HOLIDAYS_2024
+
+    if trading_day and opening <= now < close_build:
+        next_run = min(now + timedelta(seconds=SESSION_REFRESH), close_build)
+        return max((next_run - now).total_seconds(), 1)
+    if trading_day and now < opening:
+        return (opening - now).total_seconds()
+
+    # Prochaine ouverture d'un jour de bourse
+    day = now + timedelta(days=1)
+    while day.weekday() >= 5 or day.strftime('%Y-%m-%d') in FRENCH_HOLIDAYS_2024:
+        day += timedelta(days=1)
+    next_opening = PARIS_TZ.localize(datetime(day.year, day.month, day.day, 9, 0))
+    return (next_opening - now).total_seconds()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit l'instantané du tableau de bord")
+    parser.add_argument('--loop', action='store_true', help="reconstruire en continu selon les horaires d'Euronext")
+    parser.add_argument('--path', default=SNAPSHOT_PATH, help="fichier de sortie")
+    args = parser.parse_args()
+
+    data = DataAccess()
+    while True:
+        try:
+            write_snapshot(build_snapshot(data), args.path)
+            print(f"{datetime.now(PARIS_TZ):%Y-%m-%d %H:%M:%S} instantané écrit : {args.path}")
+        except Exception as e:
+            print(f"{datetime.now(PARIS_TZ):%Y-%m-%d %H:%M:%S} échec de l'instantané : {e}")
+        if not args.loop:
+            break
+        time.sleep(next_build_delay())
+
+
+if __name__ == '__main__':
+    main()
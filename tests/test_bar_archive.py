@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from bar_archive import BarArchive
+from history_store import CompactHistory
+
+
+def bars(start, closes):
+    index = pd.date_range(start, periods=len(closes), freq='D', tz='UTC')
+    closes = np.asarray(closes, dtype=np.float64)
+    frame = pd.DataFrame({
+        'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 100,
+    }, index=index)
+    return CompactHistory.from_frame(frame, 'UTC')
+
+
+def test_append_extends_file_in_place(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    archive.store('X', '1d', bars('2024-01-01', [1.0, np.nan, 3.0, 4.0]), since=None)
+    path = archive._path('X', '1d')
+    inode = os.stat(path).st_ino
+    # La dernière barre (encore ouverte) reste en mémoire
+    assert len(archive.bars('X', '1d')) == 3
+    assert len(archive.range('X', '1d')) == 4
+
+    assert archive.append('X', '1d', bars('2024-01-03', [3.0, 4.0, 5.0]))
+    assert os.stat(path).st_ino == inode
+    assert len(archive.bars('X', '1d')) == 4
+    np.testing.assert_allclose(archive.range('X', '1d').close[-2:], [4.0, 5.0])
+
+
+def test_revised_bar_replaces_file(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    archive.store('X', '1d', bars('2024-01-01', [1.0, 2.0, 3.0, 4.0]), since=None)
+    path = archive._path('X', '1d')
+    before = archive.bars('X', '1d')
+    inode = os.stat(path).st_ino
+
+    assert archive.append('X', '1d', bars('2024-01-02', [2.5, 3.0, 4.0, 5.0]))
+    assert os.stat(path).st_ino != inode
+    # Une vue déjà mappée n'est pas modifiée
+    assert before['close'][1] == 2.0
+    np.testing.assert_allclose(archive.range('X', '1d').close, [1.0, 2.5, 3.0, 4.0, 5.0])
+
+
+def test_append_with_gap_is_rejected(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    archive.store('X', '1d', bars('2024-01-01', [1.0, 2.0, 3.0]), since=None)
+    assert not archive.append('X', '1d', bars('2024-02-01', [9.0, 9.0]))
+    assert len(archive.bars('X', '1d')) == 2
+
+
+def test_split_discards_series_written_before_it(tmp_path):
+    archive = BarArchive(str(tmp_path))
+    archive.store('X', '1d', bars('2024-01-01', [1.0, 2.0, 3.0]), since=None)
+    stored_at = archive._read_meta('X', '1d')['stored_at']
+    assert not archive.discard_if_older('X', '1d', np.array([stored_at - 1]))
+    assert archive.discard_if_older('X', '1d', np.array([stored_at + 1]))
+    assert archive.range('X', '1d').is_empty
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from corporate_actions import CorporateActions, restate_splits
+from history_store import CompactHistory, build_panel
+from ledger import Ledger, make_transaction
+from portfolio_history import replay_values
+
+TZ = 'Europe/Paris'
+
+
+def daily_bars(closes, volume=1000):
+    """Barres journalières telles que fournies par Yahoo (auto_adjust=False)"""
+    idx = pd.date_range('2024-03-04', periods=len(closes), freq='B', tz=TZ)
+    closes = np.asarray(closes, dtype=np.float64)
+    frame = pd.DataFrame({
+        'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': volume,
+    }, index=idx)
+    return CompactHistory.from_frame(frame, TZ), idx
+
+
+def event(ts, dividend=0.0, split=0.0, ref_close=0.0):
+    events = np.zeros(1, dtype=[('ts', '<i8'), ('dividend', '<f8'), ('split', '<f8'), ('ref_close', '<f8')])
+    events[0] = (ts.value, dividend, split, ref_close)
+    return events
+
+
+def test_split_adjusted_bars_are_not_divided_again(tmp_path):
+    # Division 2:1 au 3e jour ; Yahoo renvoie déjà 50 pour les jours précédents (100 traité)
+    bars, idx = daily_bars([50.0, 50.0, 50.0, 50.0])
+    actions = CorporateActions(str(tmp_path))
+    actions.merge('ABC.PA', event(idx[2], split=2.0))
+
+    adjusted = actions.adjust('ABC.PA', bars)
+    np.testing.assert_allclose(adjusted.close, [50.0, 50.0, 50.0, 50.0])
+    np.testing.assert_array_equal(adjusted.volume, bars.volume)
+
+    traded = actions.unsplit('ABC.PA', bars)
+    np.testing.assert_allclose(traded.close, [100.0, 100.0, 50.0, 50.0])
+    np.testing.assert_array_equal(traded.volume, [500, 500, 1000, 1000])
+
+
+def test_dividend_adjusts_only_earlier_bars(tmp_path):
+    bars, idx = daily_bars([50.0, 50.0, 49.0, 49.0])
+    actions = CorporateActions(str(tmp_path))
+    actions.merge('ABC.PA', event(idx[2], dividend=1.0, ref_close=50.0))
+
+    adjusted = actions.adjust('ABC.PA', bars)
+    np.testing.assert_allclose(adjusted.close, [49.0, 49.0, 49.0, 49.0], rtol=1e-6)
+    np.testing.assert_allclose(actions.unsplit('ABC.PA', bars).close, bars.close)
+
+
+def test_split_replay_keeps_value_continuous(tmp_path):
+    bars, idx = daily_bars([50.0, 50.0, 50.0, 50.0])
+    actions = CorporateActions(str(tmp_path))
+    actions.merge('ABC.PA', event(idx[2], split=2.0))
+
+    ledger = Ledger()
+    ledger.record(make_transaction('buy', 'ABC.PA', date='2024-03-04 10:00:00', shares=10, price=100.0))
+    added = restate_splits(ledger, actions, TZ)
+    assert [tx['ratio'] for tx in added] == [2.0]
+    assert ledger.aggregates['ABC.PA'].quantity == 20
+
+    panel = build_panel({'ABC.PA': actions.unsplit('ABC.PA', bars)})
+    values = replay_values(ledger.holding_changes(), panel)
+    np.testing.assert_allclose(values['Valeur'], [1000.0] * 4)
+    np.testing.assert_allclose(values['Coût'], [1000.0] * 4)
+    np.testing.assert_allclose(values['Actions'], [10.0, 10.0, 20.0, 20.0])
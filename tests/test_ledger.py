@@ -0,0 +1,86 @@
+import pytest
+
+from corporate_actions import restate_splits
+from ledger import Ledger, make_transaction
+
+
+def buy(date, shares, price, symbol='ABC.PA'):
+    return make_transaction('buy', symbol, date=date, shares=shares, price=price)
+
+
+def sell(date, shares, price, symbol='ABC.PA'):
+    return make_transaction('sell', symbol, date=date, shares=shares, price=price)
+
+
+def test_aggregates_follow_transactions():
+    ledger = Ledger()
+    ledger.record(buy('2024-01-02 10:00:00', 10, 100.0))
+    ledger.record(buy('2024-01-03 10:00:00', 10, 120.0))
+    ledger.record(sell('2024-01-04 10:00:00', 5, 130.0))
+    aggregate = ledger.aggregates['ABC.PA']
+    assert aggregate.quantity == 15
+    assert aggregate.average_cost == pytest.approx(110.0)
+    assert aggregate.realized_pnl == pytest.approx(5 * 20.0)
+
+
+def test_backdated_sell_is_validated_against_history():
+    ledger = Ledger()
+    ledger.record(buy('2024-01-10 10:00:00', 10, 100.0))
+    version = ledger.version
+    # Vente antidatée avant l'achat : aucune action détenue à cette date
+    with pytest.raises(ValueError):
+        ledger.record(sell('2024-01-05 10:00:00', 5, 90.0))
+    assert len(ledger) == 1
+    assert ledger.version == version
+    assert ledger.aggregates['ABC.PA'].quantity == 10
+
+    # Achat antidaté : le symbole est rejoué dans l'ordre chronologique
+    ledger.record(buy('2024-01-02 10:00:00', 10, 80.0))
+    ledger.record(sell('2024-01-05 10:00:00', 5, 90.0))
+    aggregate = ledger.aggregates['ABC.PA']
+    assert aggregate.quantity == 15
+    assert aggregate.realized_pnl == pytest.approx(5 * 10.0)
+    assert aggregate.first_date == '2024-01-02 10:00:00'
+
+
+def test_signature_changes_with_each_transaction_and_instance():
+    ledger = Ledger()
+    before = ledger.signature
+    ledger.record(buy('2024-01-02 10:00:00', 1, 10.0))
+    assert ledger.signature != before
+    assert Ledger().signature != Ledger().signature
+
+
+class FakeActions:
+    def __init__(self, splits):
+        self._splits = splits
+
+    def splits(self, symbol, tz):
+        return self._splits.get(symbol, [])
+
+
+def test_restate_splits_adds_each_split_once():
+    ledger = Ledger()
+    ledger.record(buy('2024-01-02 10:00:00', 10, 100.0))
+    actions = FakeActions({'ABC.PA': [
+        ('2023-06-01 00:00:00', 3.0),    # antérieure à la détention
+        ('2024-02-01 00:00:00', 2.0),
+    ]})
+    added = restate_splits(ledger, actions, 'Europe/Paris')
+    assert [(tx['date'], tx['ratio']) for tx in added] == [('2024-02-01 00:00:00', 2.0)]
+    aggregate = ledger.aggregates['ABC.PA']
+    assert aggregate.quantity == 20
+    assert aggregate.average_cost == pytest.approx(50.0)
+
+    assert restate_splits(ledger, actions, 'Europe/Paris') == []
+    changes = ledger.holding_changes()
+    assert [change['shares'] for change in changes] == [10, 10]
+
+
+def test_records_round_trip():
+    ledger = Ledger()
+    ledger.record(buy('2024-01-02 10:00:00', 10, 100.0))
+    ledger.record(sell('2024-01-03 10:00:00', 4, 110.0))
+    restored = Ledger.from_records(ledger.to_records())
+    assert restored.aggregates['ABC.PA'].quantity == 6
+    assert restored.aggregates['ABC.PA'].realized_pnl == pytest.approx(40.0)
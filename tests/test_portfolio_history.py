@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ledger import Ledger, make_transaction
+from portfolio_history import PortfolioReplay, active_days, derive_curves, replay_values
+
+
+def make_panel(days, start='2024-01-01', seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=days, freq='B')
+    prices = 100 * np.cumprod(1 + rng.normal(0, 0.01, size=(days, 2)), axis=0)
+    return pd.DataFrame(prices, index=index, columns=['AAA.PA', 'BBB.PA'])
+
+
+def make_ledger():
+    ledger = Ledger()
+    ledger.record(make_transaction('buy', 'AAA.PA', date='2024-01-03 10:00:00', shares=10, price=100.0))
+    ledger.record(make_transaction('buy', 'BBB.PA', date='2024-01-10 10:00:00', shares=5, price=101.0))
+    ledger.record(make_transaction('sell', 'AAA.PA', date='2024-01-24 10:00:00', shares=4, price=103.0))
+    return ledger
+
+
+def test_replay_values_matches_holdings():
+    panel = make_panel(30)
+    values = replay_values(make_ledger().holding_changes(), panel)
+    day = pd.Timestamp('2024-01-12')
+    expected = 10 * panel.loc[day, 'AAA.PA'] + 5 * panel.loc[day, 'BBB.PA']
+    assert values.loc[day, 'Valeur'] == pytest.approx(expected)
+    assert values.loc[day, 'Coût'] == pytest.approx(10 * 100.0 + 5 * 101.0)
+    assert values['Actions'].iloc[-1] == 11
+    assert not active_days(values).iloc[0]
+
+
+def test_incremental_update_matches_full_replay():
+    ledger = make_ledger()
+    lots = ledger.holding_changes()
+    full_panel = make_panel(40)
+
+    # Dernière barre encore ouverte au premier rejeu, révisée ensuite
+    partial = full_panel.iloc[:30].copy()
+    partial.iloc[-1] *= 1.02
+    replay = PortfolioReplay()
+    replay.update(lots, partial, signature=ledger.signature)
+    replay.update(lots, full_panel.iloc[:35], signature=ledger.signature)
+    incremental = replay.update(lots, full_panel, signature=ledger.signature)
+
+    expected = derive_curves(replay_values(lots, full_panel))
+    pd.testing.assert_frame_equal(incremental, expected, check_exact=False, rtol=1e-12)
+
+
+def test_update_without_signature_detects_new_lots():
+    ledger = make_ledger()
+    panel = make_panel(30)
+    replay = PortfolioReplay()
+    replay.update(ledger.holding_changes(), panel)
+
+    ledger.record(make_transaction('buy', 'BBB.PA', date='2024-01-05 10:00:00', shares=1, price=99.0))
+    curves = replay.update(ledger.holding_changes(), panel)
+    expected = derive_curves(replay_values(ledger.holding_changes(), panel))
+    pd.testing.assert_frame_equal(curves, expected)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk import historical_var, risk_report, rolling_beta
+
+
+def test_rolling_beta_matches_direct_regression():
+    rng = np.random.default_rng(1)
+    bench = rng.normal(0, 0.01, 80)
+    returns = np.column_stack([1.5 * bench + rng.normal(0, 0.002, 80), rng.normal(0, 0.01, 80)])
+    window = 20
+    betas = rolling_beta(returns, bench, window)
+    assert betas.shape == (80 - window + 1, 2)
+    for i in (0, 30, len(betas) - 1):
+        x, y = returns[i:i + window], bench[i:i + window]
+        expected = [np.cov(x[:, j], y)[0, 1] / np.var(y, ddof=1) for j in range(2)]
+        np.testing.assert_allclose(betas[i], expected, rtol=1e-9)
+
+
+def test_historical_var_is_loss_quantile():
+    returns = np.linspace(-0.05, 0.05, 101)[:, None]
+    var, cvar = historical_var(returns, 0.95)
+    assert var[0] == pytest.approx(0.045)
+    assert cvar[0] == pytest.approx(0.0475)
+
+
+def test_risk_report_requires_benchmark_history():
+    index = pd.date_range('2024-01-01', periods=60, freq='B')
+    rng = np.random.default_rng(2)
+    close = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (60, 3)), axis=0),
+                         index=index, columns=['^FCHI', 'AAA.PA', 'BBB.PA'])
+    report = risk_report(close, '^FCHI', var_windows=(20,), beta_windows=(20,))
+    assert list(report['contributions'].index) == ['AAA.PA', 'BBB.PA']
+    assert report['contributions']['Part du risque'].sum() == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        risk_report(close.drop(columns='^FCHI'), '^FCHI')